@@ -3,6 +3,7 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 import platform
+from corpus import is_corpus, read_corpus_column
 
 class DOIExtractorApp:
     def __init__(self, root):
@@ -89,7 +90,7 @@ class DOIExtractorApp:
     def browse_file(self):
         """浏览并选择本地HTML文件"""
         file_path = filedialog.askopenfilename(
-            filetypes=[("HTML文件", "*.html;*.htm"), ("所有文件", "*.*")],
+            filetypes=[("HTML文件", "*.html;*.htm"), ("语料库文件", "*.parquet"), ("所有文件", "*.*")],
             title="选择HTML文件"
         )
         if file_path:
@@ -106,6 +107,20 @@ class DOIExtractorApp:
             messagebox.showerror("错误", "文件不存在")
             return
         
+        if is_corpus(file_path):
+            # 语料库文件中已保存每篇文献的DOI，只读取DOI列
+            try:
+                self.dois = sorted(set(doi for doi in read_corpus_column(file_path, 'doi') if doi))
+                
+                self.doi_listbox.delete(0, tk.END)
+                for doi in self.dois:
+                    self.doi_listbox.insert(tk.END, doi)
+                
+                messagebox.showinfo("成功", f"成功提取到 {len(self.dois)} 个DOI")
+            except Exception as e:
+                messagebox.showerror("错误", f"读取语料库失败: {str(e)}")
+            return
+        
         try:
             # 读取HTML文件内容
             with open(file_path, 'r', encoding='utf-8') as f:
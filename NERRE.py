@@ -1,322 +1,468 @@
 import os
-import re
 import csv
+import sys
+import json
+import hashlib
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime
-import pandas as pd
-from matplotlib.ticker import MaxNLocator
-
-# 扩展关键词定义
-PPD_KEYWORDS = [
-    # 化学名称
-    r'ppd', r'p[\s-]*phenylenediamine', r'paraphenylenediamine', 
-    r'1[\s,]*4[\s-]*diaminobenzene', r'1[\s,]*4[\s-]*benzenediamine',
-    r'parafenilendiamina', r'对苯二胺', r'对苯二胺类', r'毛发染料',
-    r'toluene[\s-]*2,4[\s-]*diamine', r'2,5[\s-]*diaminotoluene',
-    
-    # 常见衍生物
-    r'ppda', r'ppdo', r'ppd[\s-]*derivatives?',
-    r'n[\s-]*methyl[\s-]*p[\s-]*phenylenediamine',
-    r'n[\s-]*ethyl[\s-]*n[\s-]*hydroxyethyl[\s-]*p[\s-]*phenylenediamine',
-    r'n,n[\s-]*dimethyl[\s-]*p[\s-]*phenylenediamine',
-    
-    # 产品相关
-    r'permanent[\s-]*hair[\s-]*dye', r'oxidative[\s-]*hair[\s-]*dye',
-    r'染发剂', r'氧化型染发剂', r'持久性染发剂'
-]
-
-SEDIMENT_KEYWORDS = [
-    # 沉积物类型
-    r'sediment', r'deposit', r'sludge', r'bottom material', 
-    r'bed load', r'suspended solid', r'bed sediment', r'riverbed',
-    r'沉积物', r'底泥', r'底质', r'泥沙', r'河床沉积物', r'湖底沉积物',
-    r'海底沉积物', r'沉积层',
-    
-    # 相关过程
-    r'sedimentation', r'deposition', r'settling',
-    r'沉积作用', r'沉降作用', r'沉淀过程',
-    
-    # 相关测量
-    r'sediment[\s-]*core', r'sediment[\s-]*sample', r'sediment[\s-]*profile',
-    r'沉积物柱样', r'底泥样品'
-]
-
-WATER_KEYWORDS = [
-    # 水体类型
-    r'water', r'aqueous', r'hydro', r'aquatic', r'wastewater', 
-    r'effluent', r'surface water', r'groundwater', r'river water', r'lake water',
-    r'seawater', r'rainwater', r'drinking water', r'pore water',
-    r'水体', r'水样', r'水相', r'水质', r'水域', r'地表水', r'地下水',
-    r'河水', r'湖水', r'海水', r'孔隙水',
-    
-    # 水处理
-    r'water[\s-]*treatment', r'wastewater[\s-]*plant',
-    r'水处理', r'污水处理厂'
-]
-
-BIO_KEYWORDS = [
-    # 生物类型
-    r'bio', r'biota', r'organism', r'fish', r'algae', r'daphnia', 
-    r'zebrafish', r'plankton', r'invertebrate', r'mussel', r'shrimp',
-    r'生物', r'生物体', r'生物群', r'鱼类', r'藻类', r'浮游生物',
-    r'无脊椎动物', r'贻贝', r'虾类',
-    
-    # 生物过程
-    r'bioaccumulation', r'bioconcentration', r'biomagnification',
-    r'bioavailability', r'ecotoxicology', r'toxicity',
-    r'生物富集', r'生物浓缩', r'生物放大', r'生物可利用性', r'生态毒理', r'毒性',
-    
-    # 生物组织
-    r'tissue', r'organ', r'gill', r'liver', r'muscle',
-    r'组织', r'器官', r'鳃', r'肝脏', r'肌肉'
-]
-
-CONCENTRATION_PATTERNS = [
-    # 浓度单位
-    r'concentration', r'content', r'level', r'amount', r'value',
-    r'ppm', r'ppb', r'μg/L', r'mg/L', r'μg/kg', r'mg/kg', r'ng/g',
-    r'ng/L', r'pg/g', r'μg/m³', r'ng/m³',
-    r'浓度', r'含量', r'水平', r'值',
-    
-    # 测量方法
-    r'detect', r'measure', r'quantify', r'analysis',
-    r'检测', r'测定', r'定量', r'分析',
-    
-    # 相关术语
-    r'exposure', r'contamination', r'pollution', r'load',
-    r'暴露', r'污染', r'负荷'
-]
-
-def extract_articles(html_content):
-    """从WOS HTML内容中提取所有文献记录"""
-    articles = []
-    
-    # 使用正则表达式分割记录
-    record_pattern = r'Record \d+ of \d+'
-    records = re.split(record_pattern, html_content)
-    
-    # 第一个元素是空或页眉，跳过
-    records = records[1:]
-    
-    print(f"找到 {len(records)} 篇文献记录")
-    
-    for i, record in enumerate(records):
-        article = {'index': i + 1}
-        
-        # 提取标题 (绿色框)
-        title_match = re.search(r'Title:\s*(.+?)\s*Source:', record, re.DOTALL)
-        if title_match:
-            article['title'] = title_match.group(1).strip()
-        else:
-            # 尝试备选模式
-            title_match = re.search(r'Title:\s*(.+?)\s*Author\s+Identifiers:', record, re.DOTALL)
-            article['title'] = title_match.group(1).strip() if title_match else f"文献 #{i+1}"
-        
-        # 提取摘要 (红色框)
-        abstract_match = re.search(r'Abstract:\s*(.+?)\s*(?:Conference Title:|Times Cited in|$)', record, re.DOTALL)
-        if abstract_match:
-            abstract = abstract_match.group(1).strip()
-        else:
-            abstract = ""
-        
-        # 标准化摘要文本
-        article['abstract'] = ' '.join(abstract.lower().split())
-        
-        # 提取年份
-        year_match = re.search(r'Published:\s*([A-Z]{3,4}\s+(\d{4}))', record)
-        if year_match:
-            article['year'] = year_match.group(2)
-        else:
-            article['year'] = "N/A"
-        
-        # 提取作者
-        authors_match = re.search(r'By:\s*(.+?)\s*Author\s+Identifiers:', record, re.DOTALL)
-        if authors_match:
-            authors = authors_match.group(1).strip()
-            # 清理作者格式
-            authors = re.sub(r'\([^)]*\)', '', authors)  # 移除括号内的内容
-            authors = re.sub(r'\s+', ' ', authors)  # 移除多余空格
-            article['authors'] = authors
-        else:
-            article['authors'] = ""
-        
-        articles.append(article)
-    
+from lexicon import load_lexicon, BACKEND_ENV
+from matcher import BACKENDS, DEFAULT_BACKEND
+from wos_reader import article_key, expand_inputs
+from corpus import iter_inputs
+from dedup import Deduplicator, NearDuplicateIndex, NEAR_THRESHOLD
+from analysis_cache import AnalysisCache, lexicon_version
+from result_table import ResultTable
+from result_store import open_result_writer, results_path, evidence_path, read_results, EvidenceWriter
+from profiler import StageProfiler, profile_stage, MATCHER_SAMPLE
+
+# 关键词词表定义在外部文件 lexicons.json 中，启动时加载编译好的匹配器
+# （新增类别只需编辑词表文件，检测项、CSV列、统计和图表随之变化）
+LEXICON = load_lexicon()
+CATEGORY_NAMES = LEXICON.category_names
+CONCENTRATION_CATEGORIES = LEXICON.concentration_categories
+
+# 每条文献的检测项：各类别，然后是各环境介质的浓度（CSV 中的列顺序相同）
+FLAG_NAMES = LEXICON.flag_names
+
+# 结果CSV中各检测项的列名（与 FLAG_NAMES 一一对应）
+FLAG_COLUMNS = CATEGORY_NAMES + [f"{name}_Concentration" for name in CONCENTRATION_CATEGORIES]
+
+CSV_HEADER = ['Index', 'Year', 'Title', 'Authors', 'DOI'] + FLAG_COLUMNS + ['Abstract']
+
+# 关键词组合统计：{统计名: 需同时满足的检测项}
+# 第一个类别（PPD）分别与其余各类别组合，以及所有环境介质同时出现
+STAT_COMBINATIONS = {
+    f"{CATEGORY_NAMES[0]}+{name}": (CATEGORY_NAMES[0], name) for name in CATEGORY_NAMES[1:]
+}
+if len(CONCENTRATION_CATEGORIES) > 1:
+    STAT_COMBINATIONS["+".join(CONCENTRATION_CATEGORIES)] = tuple(CONCENTRATION_CATEGORIES)
+
+# 分析逻辑修改时递增，使已有的分析缓存失效
+ANALYSIS_REVISION = 1
+
+# 词表版本：任一关键词列表或浓度判断窗口变化时都会改变，用于自动作废分析缓存
+LEXICON_VERSION = lexicon_version(ANALYSIS_REVISION, LEXICON.version)
+
+# 默认的分析缓存文件名（位于结果目录中）
+CACHE_FILENAME = "analysis_cache.sqlite"
+
+# 每批分析（及查询缓存、交给子进程）的文献数
+ANALYSIS_CHUNK_SIZE = 200
+
+# matplotlib 只在生成图表时导入（--no-plots 时完全不导入），不再使用 pandas
+
+# 图表缓存文件（位于结果目录中）：记录各图表PNG对应的输入数据哈希
+PLOT_CACHE_FILENAME = "plot_cache.json"
+
+# 绘图代码修改时递增，使已有图表全部重新生成
+PLOT_REVISION = 1
+
+def extract_articles(html_paths):
+    """按表格结构逐条解析WOS导出文件中的文献记录（生成器），字段中不含HTML标记
+
+    也可传入由 corpus.py 转换得到的语料库文件（.parquet），直接读取其中的记录，不再解析HTML。
+    """
+    return iter_inputs(html_paths)
+
+def make_deduplicators(dedup=False, near_dedup=None):
+    """按选项创建去重器：dedup 为 True 时按DOI或归一化标题去重，
+    near_dedup 为相似度阈值时再按摘要的 MinHash 签名去除近似重复文献（为None时不检测）"""
+    deduplicators = []
+    if dedup:
+        deduplicators.append(Deduplicator())
+    if near_dedup is not None:
+        deduplicators.append(NearDuplicateIndex(near_dedup))
+    return deduplicators
+
+def dedup_filter(articles, source, deduplicators):
+    """依次经过各去重器，只产出不重复的文献（生成器）"""
+    for deduplicator in deduplicators:
+        articles = deduplicator.filter(articles, source)
     return articles
 
-def contains_patterns(text, patterns):
-    """检查文本是否包含任意正则表达式模式"""
-    if not text:
-        return False
-        
-    for pattern in patterns:
-        if re.search(pattern, text, re.IGNORECASE):
-            return True
-    return False
-
-def check_category(text, context_words):
-    """检查特定类别的关键词"""
-    if not text:
-        return False
-        
-    # 检查类别关键词
-    return contains_patterns(text, context_words)
+def unique_articles(html_paths, deduplicators):
+    """逐个文件读取文献并去除与之前记录重复的文献（生成器），保留的记录连续编号"""
+    if isinstance(html_paths, (str, os.PathLike)):
+        html_paths = [html_paths]
+    index = 0
+    for path in html_paths:
+        for article in dedup_filter(extract_articles(path), path, deduplicators):
+            index += 1
+            article['index'] = index
+            yield article
 
-def check_concentration(text, context_words):
-    """检查特定上下文中的浓度关键词"""
-    if not text:
-        return False
-        
-    # 构建组合正则表达式
-    combined_patterns = []
-    for word in context_words:
-        for conc in CONCENTRATION_PATTERNS:
-            # 创建灵活的匹配模式，允许中间有0-5个单词
-            pattern = fr"\b{word}\W+(?:\w+\W+){{0,5}}?{conc}\b"
-            combined_patterns.append(pattern)
+def save_dedup_report(csv_path, deduplicators):
+    """输出并保存各去重器的统计（<结果名>_dedup.csv、<结果名>_near_duplicates.csv）"""
+    for deduplicator in deduplicators:
+        deduplicator.print_report()
+        path = deduplicator.save_report(os.path.splitext(csv_path)[0] + deduplicator.REPORT_SUFFIX)
+        print(f"去重统计已保存到: {path}")
+
+def analyze_abstract(abstract):
+    """分析单篇摘要，按 FLAG_NAMES 的顺序返回各检测项结果
+
+    一次扫描得到全部类别的关键词命中情况；摘要中出现环境介质关键词时，
+    再对每个环境介质类别搜索一次组合正则，判断介质词之后 N 个单词以内是否出现浓度关键词。
+    """
+    return LEXICON.detect(abstract)
+
+def select_backend(name):
+    """切换关键词匹配后端（也作为分析子进程的初始化函数，使子进程使用相同的后端）"""
+    LEXICON.use_backend(name)
+
+def analyze_abstracts(abstracts):
+    """批量分析摘要（模块级函数，便于交给子进程执行）"""
+    return [analyze_abstract(abstract) for abstract in abstracts]
+
+def analyze_abstracts_evidence(abstracts):
+    """批量分析摘要，同时返回命中证据：[(检测结果, [(检测项序号, 起点, 终点), ...]), ...]"""
+    analyzed = []
+    for abstract in abstracts:
+        spans = []
+        analyzed.append((LEXICON.detect(abstract, evidence=spans), spans))
+    return analyzed
+
+def result_values(article):
+    """取出结果中保存的文献信息（摘要截断为前300个字符）"""
+    return {
+        "index": article['index'],
+        "title": article['title'],
+        "authors": article.get('authors', ''),
+        "year": article.get('year', ''),
+        "doi": article.get('doi', ''),
+        "abstract": article['abstract'][:300] + "..." if len(article['abstract']) > 300 else article['abstract']
+    }
+
+def iter_chunks(items, size):
+    """将文献流按固定数量切分为批次（生成器）"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def analyze_articles(articles, workers=1, cache=None, chunk_size=ANALYSIS_CHUNK_SIZE, writer=None,
+                     evidence=None):
+    """分析所有文献摘要，返回列式存储的结果表（ResultTable）
+
+    workers 大于1时以多进程分批分析，结果按原始记录顺序合并，与串行分析完全一致；
+    给定 cache（AnalysisCache）时，摘要未变的记录直接复用缓存结果，只分析其余记录；
+    给定 writer（ResultWriter）时，每批结果连同完整摘要随即写入列式结果文件；
+    给定 evidence（EvidenceWriter）时，在同一次扫描中记下每个检测项命中的关键词和位置并写入证据文件。
+    """
+    results = ResultTable(FLAG_NAMES)
+    analyze = analyze_abstracts if evidence is None else analyze_abstracts_evidence
+    
+    def collect(chunk, known, missing, flags):
+        spans = {}
+        if evidence is not None:
+            spans = dict(zip(missing, (found for _, found in flags)))
+            flags = [row for row, _ in flags]
+        # 新分析的结果写入缓存，再按原始顺序追加本批结果
+        if cache is not None and missing:
+            cache.put_many(zip(missing, flags))
+        known.update(zip(missing, flags))
+        for article in chunk:
+            results.append(result_values(article), known[article['abstract']])
+        if writer is not None:
+            writer.write(chunk, [known[article['abstract']] for article in chunk])
+        if evidence is not None:
+            evidence.write(chunk, [spans[article['abstract']] for article in chunk])
+    
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=select_backend,
+                                       initargs=(LEXICON.backend_name,))
+    try:
+        pending = deque()
+        for chunk in iter_chunks(articles, chunk_size):
+            abstracts = [article['abstract'] for article in chunk]
+            known = cache.get_many(abstracts) if cache is not None else {}
+            missing = [abstract for abstract in dict.fromkeys(abstracts) if abstract not in known]
+            if executor is None:
+                collect(chunk, known, missing, analyze(missing))
+                continue
+            # 按提交顺序取回结果即为原始记录顺序；同时在途的批次数有上限，避免一次读入全部记录
+            pending.append((chunk, known, missing, executor.submit(analyze, missing)))
+            if len(pending) >= workers * 2:
+                chunk, known, missing, future = pending.popleft()
+                collect(chunk, known, missing, future.result())
+        while pending:
+            chunk, known, missing, future = pending.popleft()
+            collect(chunk, known, missing, future.result())
+    finally:
+        if executor is not None:
+            executor.shutdown()
     
-    return contains_patterns(text, combined_patterns)
+    return results
+
+def run_analysis(articles, workers=1, cache_path=None, profiler=None, writer=None, evidence=None):
+    """读取并分析文献流，按需使用分析缓存；给定 profiler 时分别记录读取解析和分析的耗时
 
-def analyze_articles(articles):
-    """分析所有文献摘要"""
-    results = []
+    给定 writer、evidence 时边分析边写出列式结果文件和命中证据文件。
+    缓存中只有检测结果，记录命中证据时所有记录都重新扫描，不使用分析缓存。
+    """
+    if evidence is not None and cache_path:
+        print("记录命中证据时不使用分析缓存，所有记录重新分析")
+        cache_path = None
+    sample = []
+    if profiler is not None:
+        articles = sample_abstracts(profiler.timed_iter("extract", articles), sample)
     
+    with profile_stage(profiler, "analyze") as stage:
+        if cache_path:
+            with AnalysisCache(cache_path, LEXICON_VERSION, FLAG_NAMES) as cache:
+                results = analyze_articles(articles, workers=workers, cache=cache, writer=writer)
+                print(f"分析缓存命中 {cache.hits} 篇，新分析 {cache.misses} 篇")
+        else:
+            results = analyze_articles(articles, workers=workers, writer=writer, evidence=evidence)
+        stage["records"] = len(results)
+    
+    if profiler is not None:
+        # 读取解析与分析交替进行，分析阶段的耗时扣除其中读取解析所用的部分
+        profiler.exclude("analyze", "extract")
+        profiler.profile_matchers(LEXICON, sample)
+    return results
+
+def sample_abstracts(articles, sample, size=MATCHER_SAMPLE):
+    """原样产出文献，同时保留最先出现的 size 篇摘要，用于测量各类别的匹配耗时"""
     for article in articles:
-        abstract = article['abstract']
-        
-        # 检测关键词 - 只要匹配类别关键词就认为存在
-        has_ppd = check_category(abstract, PPD_KEYWORDS)
-        has_sediment = check_category(abstract, SEDIMENT_KEYWORDS)
-        has_water = check_category(abstract, WATER_KEYWORDS)
-        has_bio = check_category(abstract, BIO_KEYWORDS)
-        
-        # 检测浓度关键词组合
-        has_sediment_conc = check_concentration(abstract, SEDIMENT_KEYWORDS) if has_sediment else False
-        has_water_conc = check_concentration(abstract, WATER_KEYWORDS) if has_water else False
-        has_bio_conc = check_concentration(abstract, BIO_KEYWORDS) if has_bio else False
-        
-        result = {
-            "index": article['index'],
-            "title": article['title'],
-            "authors": article.get('authors', ''),
-            "year": article.get('year', ''),
-            "PPD": has_ppd,
-            "Sediment": has_sediment,
-            "Water": has_water,
-            "Biological": has_bio,
-            "Sediment_Conc": has_sediment_conc,
-            "Water_Conc": has_water_conc,
-            "Biological_Conc": has_bio_conc,
-            "abstract": article['abstract'][:300] + "..." if len(article['abstract']) > 300 else article['abstract']
-        }
+        if len(sample) < size:
+            sample.append(article['abstract'])
+        yield article
+
+def write_results_csv(csv_path, results, append=False):
+    """将分析结果写入CSV文件（append 为 True 时追加到已有文件末尾，不再写表头）"""
+    with open(csv_path, 'a' if append else 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        if not append:
+            writer.writerow(CSV_HEADER)
         
-        results.append(result)
-    
+        columns = results.columns
+        flags = results.flags.astype(np.uint8).tolist()
+        for index, year, title, authors, doi, row_flags, abstract in zip(
+            columns['index'], columns['year'], columns['title'], columns['authors'],
+            columns['doi'], flags, columns['abstract']
+        ):
+            writer.writerow([index, year, title, authors, doi] + row_flags + [abstract])
+
+def read_csv_header(csv_path):
+    """读取结果CSV的表头（空文件返回空列表）"""
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        return next(csv.reader(f), [])
+
+def load_results_csv(csv_path, results=None, index_offset=0):
+    """读取已保存的结果CSV，还原为结果表（摘要为截断后的内容）
+
+    给出 results 时追加到该结果表中；各记录的编号加上 index_offset（合并分片结果时接着编号）。
+    """
+    if results is None:
+        results = ResultTable(FLAG_NAMES)
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            values = {
+                "index": int(row['Index']) + index_offset,
+                "title": row['Title'],
+                "authors": row.get('Authors', ''),
+                "year": row['Year'],
+                "doi": row.get('DOI', ''),
+                "abstract": row['Abstract']
+            }
+            results.append(values, [row[column] == '1' for column in FLAG_COLUMNS])
     return results
 
+def compute_totals(results):
+    """统计各检测项及关键词组合的文献数（由结果表的布尔矩阵向量化计算）"""
+    totals = results.statistics(STAT_COMBINATIONS)
+    totals["lexicon_version"] = LEXICON_VERSION
+    return totals
+
+def add_totals(totals, delta):
+    """在已有统计总数上累加新增记录的统计（计数、共现矩阵和组合分布均可直接相加）"""
+    counts = dict(totals["counts"])
+    for label, count in delta["counts"].items():
+        counts[label] = counts.get(label, 0) + count
+    combinations = dict(totals["combinations"])
+    for label, count in delta["combinations"].items():
+        combinations[label] = combinations.get(label, 0) + count
+    return {
+        "total": totals["total"] + delta["total"],
+        "counts": counts,
+        "flag_names": totals["flag_names"],
+        "cooccurrence": (np.array(totals["cooccurrence"]) + np.array(delta["cooccurrence"])).tolist(),
+        "combinations": combinations,
+        "lexicon_version": totals.get("lexicon_version", delta["lexicon_version"])
+    }
+
+def totals_path(csv_path):
+    """结果CSV对应的统计总数文件路径"""
+    return os.path.splitext(csv_path)[0] + "_totals.json"
+
+def save_totals(csv_path, totals):
+    """保存统计总数，供增量模式在其上累加"""
+    with open(totals_path(csv_path), 'w', encoding='utf-8') as f:
+        json.dump(totals, f, ensure_ascii=False, indent=2)
+
+def save_cooccurrence(csv_path, totals):
+    """将检测项共现矩阵保存为CSV文件（第一行、第一列为检测项名称）"""
+    names = totals["flag_names"]
+    path = os.path.splitext(csv_path)[0] + "_cooccurrence.csv"
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([''] + names)
+        for name, row in zip(names, totals["cooccurrence"]):
+            writer.writerow([name] + row)
+    return path
+
+def format_matrix(names, matrix):
+    """将方阵格式化为文本表格（行名左对齐，各列右对齐）"""
+    label_width = max(len(name) for name in names)
+    widths = [max(len(name), *(len(str(row[j])) for row in matrix)) for j, name in enumerate(names)]
+    lines = [" " * label_width + "".join("  " + name.rjust(w) for name, w in zip(names, widths))]
+    for name, row in zip(names, matrix):
+        lines.append(name.ljust(label_width) + "".join("  " + str(v).rjust(w) for v, w in zip(row, widths)))
+    return "\n".join(lines)
+
+def load_totals(csv_path):
+    """读取保存的统计总数，不存在时返回None"""
+    path = totals_path(csv_path)
+    if not os.path.isfile(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def combination_text(names):
+    """关键词组合统计项的中文说明"""
+    if len(names) > 2 and list(names) == CONCENTRATION_CATEGORIES:
+        return "同时包含所有环境介质"
+    return "同时包含" + "和".join(LEXICON.label(name) for name in names)
+
+def print_statistics(totals):
+    """在控制台输出统计摘要"""
+    counts = totals["counts"]
+    total = totals["total"]
+    print("\n" + "="*120)
+    print("关键词检测统计:")
+    for name in CATEGORY_NAMES:
+        print(f"包含{LEXICON.label(name)}的文献: {counts[name]}/{total}")
+    
+    # 浓度统计
+    print("\n浓度关键词统计:")
+    for name in CONCENTRATION_CATEGORIES:
+        print(f"包含{LEXICON.label(name)}浓度的文献: {counts[name + '_Conc']}/{total}")
+    
+    # 关键词组合统计
+    print("\n关键词组合统计:")
+    for label, names in STAT_COMBINATIONS.items():
+        print(f"{combination_text(names)}: {counts[label]}")
+    
+    # 完整的两两共现矩阵（对角线为各检测项的文献数）
+    names = totals["flag_names"]
+    print("\n检测项共现矩阵:")
+    print(format_matrix(names, totals["cooccurrence"]))
+    
+    # 各检测项组合（恰好命中这些检测项）的文献数，按文献数从多到少排列
+    print("\n检测项组合分布:")
+    for label, count in sorted(totals["combinations"].items(), key=lambda item: (-item[1], item[0])):
+        print(f"{label or '无检测项'}: {count}")
+    print("="*120)
+
+def signal_plot_inputs(results):
+    """信号峰图的输入数据：文献编号及各类别的检测结果（只有这两项会传给绘图子进程）"""
+    indices = np.asarray(results.columns['index'], dtype=np.int64)
+    flags = np.column_stack([results.flag(name) for name in CATEGORY_NAMES])
+    return indices, flags
+
 def generate_signal_plot(results, output_dir):
-    """生成信号峰图"""
+    """生成信号峰图（每个类别一个子图）"""
     if not results:
         return
-        
-    # 提取检测结果
-    indices = [r['index'] for r in results]
-    ppd = [int(r['PPD']) for r in results]
-    sediment = [int(r['Sediment']) for r in results]
-    water = [int(r['Water']) for r in results]
-    bio = [int(r['Biological']) for r in results]
+    
+    plot_path = render_signal_plot(*signal_plot_inputs(results), output_dir)
+    print(f"已生成信号峰图: {plot_path}")
+    return plot_path
+
+def render_signal_plot(indices, flags, output_dir):
+    """根据文献编号和 N×类别数 的检测结果绘制信号峰图，返回PNG路径（模块级函数，便于交给子进程执行）"""
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import MaxNLocator
+    from signal_plot import draw_signal_track, PNG_COMPRESS_LEVEL
     
     # 创建子图
-    fig, axes = plt.subplots(4, 1, figsize=(15, 10), sharex=True)
+    fig, axes = plt.subplots(len(CATEGORY_NAMES), 1, figsize=(15, 2.5 * len(CATEGORY_NAMES)),
+                             sharex=True, squeeze=False)
+    axes = axes[:, 0]
     plt.subplots_adjust(hspace=0.1)  # 减少子图间距
     
-    # 绘制PPD信号
-    axes[0].bar(indices, ppd, width=1.0, color='#1f77b4', alpha=0.7)
-    axes[0].set_ylabel('PPD', fontsize=12)
-    axes[0].set_ylim(0, 1.1)
-    axes[0].yaxis.set_major_locator(MaxNLocator(integer=True))
-    axes[0].grid(axis='y', linestyle='--', alpha=0.7)
-    
-    # 绘制沉积物信号
-    axes[1].bar(indices, sediment, width=1.0, color='#ff7f0e', alpha=0.7)
-    axes[1].set_ylabel('Sediment', fontsize=12)
-    axes[1].set_ylim(0, 1.1)
-    axes[1].yaxis.set_major_locator(MaxNLocator(integer=True))
-    axes[1].grid(axis='y', linestyle='--', alpha=0.7)
-    
-    # 绘制水体信号
-    axes[2].bar(indices, water, width=1.0, color='#2ca02c', alpha=0.7)
-    axes[2].set_ylabel('Water', fontsize=12)
-    axes[2].set_ylim(0, 1.1)
-    axes[2].yaxis.set_major_locator(MaxNLocator(integer=True))
-    axes[2].grid(axis='y', linestyle='--', alpha=0.7)
-    
-    # 绘制生物信号
-    axes[3].bar(indices, bio, width=1.0, color='#d62728', alpha=0.7)
-    axes[3].set_ylabel('Biological', fontsize=12)
-    axes[3].set_ylim(0, 1.1)
-    axes[3].set_xlabel('Literature Index', fontsize=12)
-    axes[3].yaxis.set_major_locator(MaxNLocator(integer=True))
-    axes[3].grid(axis='y', linestyle='--', alpha=0.7)
+    # 绘制各类别信号
+    for i, (ax, name) in enumerate(zip(axes, CATEGORY_NAMES)):
+        draw_signal_track(ax, indices, flags[:, i], LEXICON.color(name, f"C{i}"))
+        ax.set_ylabel(name, fontsize=12)
+        ax.set_ylim(0, 1.1)
+        ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+    axes[-1].set_xlabel('Literature Index', fontsize=12)
     
     # 设置整体标题
     fig.suptitle('Literature Keyword Detection Signals', fontsize=16, y=0.95)
     
     # 保存图像
     plot_path = os.path.join(output_dir, "keyword_signals.png")
-    plt.savefig(plot_path, dpi=300, bbox_inches='tight')
+    plt.savefig(plot_path, dpi=300, bbox_inches='tight', pil_kwargs={'compress_level': PNG_COMPRESS_LEVEL})
     plt.close()
-    
-    print(f"已生成信号峰图: {plot_path}")
     return plot_path
 
-def generate_summary_plot(results, output_dir):
-    """生成关键词出现次数统计图"""
-    if not results:
+def generate_summary_plot(totals, output_dir):
+    """生成关键词出现次数统计图（根据统计总数绘制）"""
+    if not totals or not totals["total"]:
         return
-        
-    # 计算每个关键词的出现次数
-    ppd_count = sum(1 for r in results if r['PPD'])
-    sediment_count = sum(1 for r in results if r['Sediment'])
-    water_count = sum(1 for r in results if r['Water'])
-    bio_count = sum(1 for r in results if r['Biological'])
     
-    # 计算浓度关键词出现次数
-    sediment_conc_count = sum(1 for r in results if r['Sediment_Conc'])
-    water_conc_count = sum(1 for r in results if r['Water_Conc'])
-    bio_conc_count = sum(1 for r in results if r['Biological_Conc'])
+    summary_path = render_summary_plot(totals["counts"], output_dir)
+    print(f"已生成关键词统计图: {summary_path}")
+    return summary_path
+
+def render_summary_plot(counts, output_dir):
+    """根据各检测项的文献数绘制关键词统计图（含各环境介质的浓度），返回PNG路径"""
+    import matplotlib.pyplot as plt
     
-    # 创建图形
-    fig, axes = plt.subplots(2, 1, figsize=(12, 10))
+    colors = [LEXICON.color(name, f"C{i}") for i, name in enumerate(CATEGORY_NAMES)]
+    
+    # 创建图形（没有环境介质类别时只有第一图）
+    fig, axes = plt.subplots(2 if CONCENTRATION_CATEGORIES else 1, 1, figsize=(12, 10), squeeze=False)
+    axes = axes[:, 0]
     
     # 第一图：关键词出现次数
-    categories = ['PPD', 'Sediment', 'Water', 'Biological']
-    counts = [ppd_count, sediment_count, water_count, bio_count]
-    colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728']
+    category_counts = [counts[name] for name in CATEGORY_NAMES]
     
-    axes[0].bar(categories, counts, color=colors, alpha=0.7)
+    axes[0].bar(CATEGORY_NAMES, category_counts, color=colors, alpha=0.7)
     axes[0].set_title('Keyword Occurrence Counts', fontsize=14)
     axes[0].set_ylabel('Number of Papers', fontsize=12)
     axes[0].grid(axis='y', linestyle='--', alpha=0.7)
     
     # 添加数值标签
-    for i, count in enumerate(counts):
+    for i, count in enumerate(category_counts):
         axes[0].text(i, count + 5, str(count), ha='center', va='bottom', fontsize=10)
     
     # 第二图：浓度关键词出现次数
-    conc_categories = ['Sediment\nConcentration', 'Water\nConcentration', 'Biological\nConcentration']
-    conc_counts = [sediment_conc_count, water_conc_count, bio_conc_count]
-    conc_colors = ['#ff7f0e', '#2ca02c', '#d62728']
-    
-    axes[1].bar(conc_categories, conc_counts, color=conc_colors, alpha=0.7)
-    axes[1].set_title('Concentration Keyword Occurrence Counts', fontsize=14)
-    axes[1].set_ylabel('Number of Papers', fontsize=12)
-    axes[1].grid(axis='y', linestyle='--', alpha=0.7)
-    
-    # 添加数值标签
-    for i, count in enumerate(conc_counts):
-        axes[1].text(i, count + 2, str(count), ha='center', va='bottom', fontsize=10)
+    if CONCENTRATION_CATEGORIES:
+        conc_categories = [f"{name}\nConcentration" for name in CONCENTRATION_CATEGORIES]
+        conc_counts = [counts[name + '_Conc'] for name in CONCENTRATION_CATEGORIES]
+        conc_colors = [colors[CATEGORY_NAMES.index(name)] for name in CONCENTRATION_CATEGORIES]
+        
+        axes[1].bar(conc_categories, conc_counts, color=conc_colors, alpha=0.7)
+        axes[1].set_title('Concentration Keyword Occurrence Counts', fontsize=14)
+        axes[1].set_ylabel('Number of Papers', fontsize=12)
+        axes[1].grid(axis='y', linestyle='--', alpha=0.7)
+        
+        # 添加数值标签
+        for i, count in enumerate(conc_counts):
+            axes[1].text(i, count + 2, str(count), ha='center', va='bottom', fontsize=10)
     
     # 调整布局
     plt.tight_layout()
@@ -325,106 +471,382 @@ def generate_summary_plot(results, output_dir):
     summary_path = os.path.join(output_dir, "keyword_summary.png")
     plt.savefig(summary_path, dpi=300, bbox_inches='tight')
     plt.close()
-    
-    print(f"已生成关键词统计图: {summary_path}")
     return summary_path
 
-def process_html_file(html_file_path, output_dir):
-    """处理包含多篇文献的HTML文件"""
+def plot_hash(name, *arrays):
+    """图表输入数据的哈希：检测结果、类别名称、颜色或绘图代码任一变化都会得到不同的值"""
+    digest = hashlib.sha256()
+    style = [PLOT_REVISION, name, CATEGORY_NAMES, CONCENTRATION_CATEGORIES,
+             [LEXICON.color(category) for category in CATEGORY_NAMES]]
+    digest.update(json.dumps(style, ensure_ascii=False).encode('utf-8'))
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype}{array.shape}".encode('ascii'))
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+class PlotJob:
+    """在单独的子进程中生成信号峰图和统计图，主进程同时写出CSV、统计和共现矩阵
+
+    每张图的输入数据（信号峰图为文献编号和各类别检测结果，统计图为各检测项的文献数）
+    计算一个哈希，与结果目录中 plot_cache.json 记录的、生成现有PNG时的哈希相同时
+    直接沿用现有PNG，不再启动子进程；结果没有变化的重复运行不再绘图。
+    """
+    
+    def __init__(self, results, totals, output_dir):
+        self.output_dir = output_dir
+        self.cache_path = os.path.join(output_dir, PLOT_CACHE_FILENAME)
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+        
+        indices, flags = signal_plot_inputs(results)
+        counts = np.array([totals["counts"][name] for name in FLAG_NAMES], dtype=np.int64)
+        # (图表, 显示名称, 文件名, 绘图函数, 参数, 输入哈希)
+        plots = [
+            ("signal", "信号峰图", "keyword_signals.png", render_signal_plot, (indices, flags),
+             plot_hash("signal", indices, flags)),
+            ("summary", "关键词统计图", "keyword_summary.png", render_summary_plot, (totals["counts"],),
+             plot_hash("summary", counts)),
+        ]
+        self.paths = {}
+        self.hashes = {}
+        self.futures = {}
+        self.labels = {}
+        self.executor = None
+        for key, label, filename, render, args, digest in plots:
+            path = os.path.join(output_dir, filename)
+            self.paths[key] = path
+            self.labels[key] = label
+            if self.cache.get(filename) == digest and os.path.isfile(path):
+                continue
+            self.hashes[filename] = digest
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=1)
+            self.futures[key] = self.executor.submit(render, *args, output_dir)
+    
+    def wait(self):
+        """等待子进程绘图完成并更新图表缓存，返回 {图表: PNG路径}"""
+        try:
+            for key, path in self.paths.items():
+                future = self.futures.get(key)
+                if future is None:
+                    print(f"{self.labels[key]}的数据未变化，沿用: {path}")
+                    continue
+                future.result()
+                print(f"已生成{self.labels[key]}: {path}")
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+        if self.hashes:
+            self.cache.update(self.hashes)
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump(self.cache, f, indent=2)
+            self.hashes = {}
+        return self.paths
+
+def process_html_file(html_file_path, output_dir, workers=1, cache_path=None, profiler=None, plots=True,
+                      parquet=False, evidence=False, dedup=False, near_dedup=None):
+    """处理包含多篇文献的HTML文件（也可传入多个文件路径的列表，按顺序连续编号）
+
+    workers 大于1时以多进程分批分析摘要，输出与串行分析逐字节相同；
+    给定 cache_path 时使用该SQLite文件缓存逐条分析结果，重复出现的记录不再重新分析；
+    给定 profiler（StageProfiler）时记录各阶段的耗时和内存；plots 为 False 时不生成图表；
+    parquet 为 True 时另存一份含完整摘要的列式结果文件（与结果CSV同名，扩展名为 .parquet）；
+    evidence 为 True 时另存各检测项的命中证据（<结果名>_evidence.parquet）；
+    dedup 为 True 时在分析之前去除重复文献（DOI相同，没有DOI时标题相同）；
+    near_dedup 为相似度阈值时在分析之前将摘要近似重复的文献聚类，每个聚类只保留最先出现的一篇。
+    """
     print(f"开始处理文件: {html_file_path}")
     
     # 创建输出目录
     os.makedirs(output_dir, exist_ok=True)
     
-    try:
-        with open(html_file_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-    except UnicodeDecodeError:
-        try:
-            with open(html_file_path, 'r', encoding='latin-1') as f:
-                html_content = f.read()
-        except Exception as e:
-            print(f"解码错误: {e}")
+    # 以内存映射方式逐条读取、提取并分析记录，不再一次性读入整个文件
+    print("开始提取并分析摘要中的关键词...")
+    if workers > 1:
+        print(f"使用 {workers} 个进程并行分析")
+    deduplicators = make_deduplicators(dedup, near_dedup)
+    articles = unique_articles(html_file_path, deduplicators) if deduplicators else extract_articles(html_file_path)
+    with open_result_writer(output_dir, FLAG_COLUMNS, parquet) as writer, \
+            open_result_writer(output_dir, FLAG_COLUMNS, evidence, EvidenceWriter) as evidence_writer:
+        results = run_analysis(articles, workers, cache_path, profiler, writer, evidence_writer)
+        
+        if not results:
+            print("未找到文献记录，请检查文件格式")
             return []
+        
+        print(f"成功提取并分析 {len(results)} 篇文献")
+        
+        # 生成带时间戳的输出文件名
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_csv = os.path.join(output_dir, f"literature_analysis_{timestamp}.csv")
+        save_parquet(writer, evidence_writer, output_csv)
     
-    # 提取所有文献记录
-    articles = extract_articles(html_content)
+    # 先统计并开始在子进程中绘图，同时保存完整结果到CSV文件，并保存统计总数供增量模式使用
+    with profile_stage(profiler, "statistics", len(results)):
+        totals = compute_totals(results)
+    plot_job = start_plots(results, totals, output_dir, profiler, plots)
+    with profile_stage(profiler, "write_csv", len(results)):
+        write_results_csv(output_csv, results)
+        save_totals(output_csv, totals)
     
-    if not articles:
-        print("未找到文献记录，请检查文件格式")
+    print(f"\n完整结果已保存到: {output_csv}")
+    if deduplicators:
+        save_dedup_report(output_csv, deduplicators)
+    
+    return finish_outputs(output_csv, results, totals, output_dir, profiler, plot_job)
+
+def existing_records(existing, existing_csv, deduplicator):
+    """已有结果中供去重器登记的记录：近似重复检测需要完整摘要，从列式结果文件中读取
+
+    没有列式结果文件时CSV中的摘要只有前300个字符，已有记录不参与近似重复检测。
+    """
+    if not isinstance(deduplicator, NearDuplicateIndex):
+        return existing.records()
+    path = results_path(existing_csv)
+    if not os.path.isfile(path):
+        print("警告: 已有结果没有列式结果文件，已有记录不参与近似重复检测")
         return []
+    return read_results(path, columns=['index', 'title', 'abstract']).to_pylist()
+
+def append_html_file(html_file_path, existing_csv, workers=1, cache_path=None, profiler=None, plots=True,
+                     parquet=False, evidence=False, dedup=False, near_dedup=None):
+    """增量模式：只分析新导出文件中此前未出现过的文献，追加到已有结果CSV并更新统计和图
+
+    已有记录按DOI（没有DOI时按标题、年份和摘要开头的指纹）识别，不再重新分析；
+    dedup 为 True 时另按DOI或归一化标题去除重复文献（同一篇文献的不同版本摘要也会被去除）；
+    near_dedup 为相似度阈值时另去除摘要与已有或新增文献近似重复的文献（已有记录的完整摘要取自列式结果文件）；
+    统计数据在保存的总数上累加，新记录接着已有记录编号。
+    """
+    print(f"开始增量处理文件: {html_file_path}")
+    output_dir = os.path.dirname(existing_csv) or "."
+    
+    # 已有CSV的列与当前格式不同时不能追加：缺少检测项列说明关键词类别已修改；
+    # 旧版结果（没有DOI列）的标题和摘要中残留HTML标记、年份为N/A，部分记录的标题与摘要错位，
+    # 无法与新读取的文献可靠地对应，追加会重复统计同一篇文献
+    header = read_csv_header(existing_csv)
+    if header != CSV_HEADER:
+        missing = [column for column in CSV_HEADER if column not in header]
+        if any(column not in ('Authors', 'DOI') for column in missing):
+            print(f"错误: 已有结果CSV缺少列 {', '.join(missing)}，与当前关键词列表不一致，无法追加，请重新完整分析")
+        else:
+            detail = f"缺少列 {', '.join(missing)}" if missing else "列的顺序与当前格式不同"
+            print(f"错误: 已有结果CSV是旧版格式（{detail}），其中的文献无法与新导出文件可靠地对应，"
+                  f"无法追加，请对全部导出文件重新完整分析")
+        return []
+    
+    # 读取已有结果（只读CSV，不重新分析）
+    with profile_stage(profiler, "load_csv") as stage:
+        existing = load_results_csv(existing_csv)
+        totals = load_totals(existing_csv)
+        if totals is None or totals["total"] != len(existing) or "cooccurrence" not in totals:
+            totals = compute_totals(existing)
+        elif totals.get("lexicon_version") != LEXICON_VERSION:
+            print("警告: 关键词列表已修改，已有记录与新记录的检测标准不一致，建议重新完整分析")
+        stage["records"] = len(existing)
+    print(f"已有结果 {len(existing)} 篇文献")
+    
+    seen = {article_key(r) for r in existing.records()}
+    next_index = max(existing.columns['index'], default=0) + 1
+    skipped = 0
+    # 先登记已有记录的指纹，新导出文件中与之重复的文献计入各文件的去重统计
+    deduplicators = make_deduplicators(dedup, near_dedup)
+    for deduplicator in deduplicators:
+        for _ in deduplicator.filter(existing_records(existing, existing_csv, deduplicator), existing_csv):
+            pass
+    
+    def new_articles():
+        # 跳过已分析过的记录（包括新导出文件内部的重复记录），其余接着编号
+        paths = [html_file_path] if isinstance(html_file_path, (str, os.PathLike)) else html_file_path
+        for path in paths:
+            yield from unseen_articles(dedup_filter(extract_articles(path), path, deduplicators))
     
-    print(f"成功提取 {len(articles)} 篇文献")
-    print("开始分析摘要中的关键词...")
+    def unseen_articles(articles):
+        nonlocal next_index, skipped
+        for article in articles:
+            key = article_key(article)
+            if key in seen:
+                skipped += 1
+                continue
+            seen.add(key)
+            article['index'] = next_index
+            next_index += 1
+            yield article
     
-    # 分析每篇文献
-    results = analyze_articles(articles)
+    print("开始提取并分析新增文献...")
+    with open_result_writer(output_dir, FLAG_COLUMNS, parquet) as writer, \
+            open_result_writer(output_dir, FLAG_COLUMNS, evidence, EvidenceWriter) as evidence_writer:
+        if writer is not None:
+            # 列式结果文件中先写入已有记录，新记录接在其后
+            existing_parquet = results_path(existing_csv)
+            if os.path.isfile(existing_parquet):
+                writer.copy_from(existing_parquet)
+            else:
+                print("警告: 已有结果没有列式结果文件，其中已有记录的摘要取自CSV（截断为前300个字符）")
+                writer.write(existing.records(), existing.flags.tolist())
+        if evidence_writer is not None:
+            existing_evidence = evidence_path(existing_csv)
+            if os.path.isfile(existing_evidence):
+                evidence_writer.copy_from(existing_evidence)
+            else:
+                print("警告: 已有结果没有命中证据文件，证据文件中只有新增文献")
+        added = run_analysis(new_articles(), workers, cache_path, profiler, writer, evidence_writer)
+        print(f"跳过已有文献 {skipped} 篇，新增分析 {len(added)} 篇")
+        save_parquet(writer, evidence_writer, existing_csv)
     
-    # 生成带时间戳的输出文件名
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_csv = os.path.join(output_dir, f"literature_analysis_{timestamp}.csv")
+    if added:
+        with profile_stage(profiler, "statistics", len(added)):
+            totals = add_totals(totals, compute_totals(added))
+    combined = existing.concat(added)
+    plot_job = start_plots(combined, totals, output_dir, profiler, plots)
+    if added:
+        with profile_stage(profiler, "write_csv", len(added)):
+            write_results_csv(existing_csv, added, append=True)
+    save_totals(existing_csv, totals)
     
-    # 保存完整结果到CSV文件
-    with open(output_csv, 'w', encoding='utf-8', newline='') as f:
+    print(f"\n结果已追加到: {existing_csv}")
+    if deduplicators:
+        save_dedup_report(existing_csv, deduplicators)
+    
+    return finish_outputs(existing_csv, combined, totals, output_dir, profiler, plot_job)
+
+def save_parquet(writer, evidence_writer, csv_path):
+    """将边分析边写出的列式结果文件和命中证据文件保存在结果CSV旁（为None的跳过）"""
+    if writer is not None:
+        path = writer.commit(results_path(csv_path))
+        print(f"列式结果（含完整摘要）已保存到: {path}")
+    if evidence_writer is not None:
+        path = evidence_writer.commit(evidence_path(csv_path))
+        print(f"命中证据（{evidence_writer.count} 条）已保存到: {path}")
+
+def write_file_breakdown(csv_path, spans, results):
+    """按输入文件拆分结果：每个文件一份CSV和统计总数，另存一张各文件统计对照表
+
+    各文件CSV中的编号与合并结果CSV中的编号相同，便于对照。各文件CSV以输入顺序的序号开头，
+    序号补零到文件总数的位数（不到10个文件时如 1_savedrecs.csv，10到99个文件时如 01_savedrecs.csv），
+    不同目录中的同名导出文件不会相互覆盖。
+    """
+    breakdown_dir = os.path.splitext(csv_path)[0] + "_files"
+    os.makedirs(breakdown_dir, exist_ok=True)
+    
+    rows = []
+    width = len(str(len(spans)))
+    for number, (path, start, stop) in enumerate(spans, 1):
+        part = results.slice(start, stop)
+        name = os.path.splitext(os.path.basename(path))[0]
+        part_csv = os.path.join(breakdown_dir, f"{number:0{width}d}_{name}.csv")
+        write_results_csv(part_csv, part)
+        part_totals = compute_totals(part)
+        save_totals(part_csv, part_totals)
+        rows.append((path, part_totals))
+    
+    summary_path = os.path.splitext(csv_path)[0] + "_by_file.csv"
+    labels = FLAG_NAMES + list(STAT_COMBINATIONS)
+    with open(summary_path, 'w', encoding='utf-8', newline='') as f:
         writer = csv.writer(f)
-        writer.writerow([
-            'Index', 'Year', 'Title', 'Authors', 
-            'PPD', 'Sediment', 'Water', 'Biological',
-            'Sediment_Concentration', 'Water_Concentration', 'Biological_Concentration',
-            'Abstract'
-        ])
-        
-        for res in results:
-            writer.writerow([
-                res['index'],
-                res['year'],
-                res['title'],
-                res.get('authors', ''),
-                int(res['PPD']),
-                int(res['Sediment']),
-                int(res['Water']),
-                int(res['Biological']),
-                int(res['Sediment_Conc']),
-                int(res['Water_Conc']),
-                int(res['Biological_Conc']),
-                res['abstract']
-            ])
+        writer.writerow(['File', 'Total'] + labels)
+        for path, part_totals in rows:
+            writer.writerow([path, part_totals["total"]] + [part_totals["counts"][label] for label in labels])
+    return breakdown_dir, summary_path, rows
+
+def process_batch(html_files, output_dir, workers=1, cache_path=None, profiler=None, plots=True, parquet=False,
+                  evidence=False, dedup=False, near_dedup=None):
+    """批量模式：在同一进程中依次分析多个导出文件（共用已编译的匹配器和分析缓存）
+
+    所有文件的记录连续编号，写出一份合并结果（CSV、统计、图表），
+    并按输入文件拆分出各文件的结果和统计对照表。
+    """
+    print(f"开始批量处理 {len(html_files)} 个文件")
+    os.makedirs(output_dir, exist_ok=True)
     
-    print(f"\n完整结果已保存到: {output_csv}")
+    # 每个文件的记录在合并结果中的行范围 (文件, 起始行, 结束行)
+    spans = []
     
-    # 生成信号峰图
-    signal_path = generate_signal_plot(results, output_dir)
+    # 去重时，各文件中与之前文件（或本文件中之前记录）重复的文献在分析之前去除
+    deduplicators = make_deduplicators(dedup, near_dedup)
     
-    # 生成关键词统计图
-    summary_path = generate_summary_plot(results, output_dir)
+    def batch_articles():
+        count = 0
+        for path in html_files:
+            start = count
+            for article in dedup_filter(extract_articles(path), path, deduplicators):
+                count += 1
+                article['index'] = count
+                yield article
+            spans.append((path, start, count))
+            if deduplicators:
+                dropped = sum(deduplicator.stats[path][1] for deduplicator in deduplicators)
+                print(f"  {path}: {count - start} 篇（去除重复 {dropped} 篇）")
+            else:
+                print(f"  {path}: {count - start} 篇")
     
-    # 统计摘要
-    print("\n" + "="*120)
-    print("关键词检测统计:")
-    print(f"包含PPD的文献: {sum(1 for r in results if r['PPD'])}/{len(results)}")
-    print(f"包含沉积物的文献: {sum(1 for r in results if r['Sediment'])}/{len(results)}")
-    print(f"包含水体的文献: {sum(1 for r in results if r['Water'])}/{len(results)}")
-    print(f"包含生物的文献: {sum(1 for r in results if r['Biological'])}/{len(results)}")
+    print("开始提取并分析摘要中的关键词...")
+    if workers > 1:
+        print(f"使用 {workers} 个进程并行分析")
+    with open_result_writer(output_dir, FLAG_COLUMNS, parquet) as writer, \
+            open_result_writer(output_dir, FLAG_COLUMNS, evidence, EvidenceWriter) as evidence_writer:
+        results = run_analysis(batch_articles(), workers, cache_path, profiler, writer, evidence_writer)
+        
+        if not results:
+            print("未找到文献记录，请检查文件格式")
+            return []
+        
+        print(f"成功提取并分析 {len(results)} 篇文献")
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_csv = os.path.join(output_dir, f"literature_analysis_{timestamp}.csv")
+        save_parquet(writer, evidence_writer, output_csv)
+    with profile_stage(profiler, "statistics", len(results)):
+        totals = compute_totals(results)
+    plot_job = start_plots(results, totals, output_dir, profiler, plots)
+    with profile_stage(profiler, "write_csv", len(results)):
+        write_results_csv(output_csv, results)
+        save_totals(output_csv, totals)
+    print(f"\n合并结果已保存到: {output_csv}")
+    if deduplicators:
+        save_dedup_report(output_csv, deduplicators)
     
-    # 浓度统计
-    print("\n浓度关键词统计:")
-    print(f"包含沉积物浓度的文献: {sum(1 for r in results if r['Sediment_Conc'])}/{len(results)}")
-    print(f"包含水体浓度的文献: {sum(1 for r in results if r['Water_Conc'])}/{len(results)}")
-    print(f"包含生物浓度的文献: {sum(1 for r in results if r['Biological_Conc'])}/{len(results)}")
+    with profile_stage(profiler, "file_breakdown", len(results)):
+        breakdown_dir, summary_path, rows = write_file_breakdown(output_csv, spans, results)
+    print(f"各文件结果已保存到: {breakdown_dir}")
+    print(f"各文件统计对照表已保存到: {summary_path}")
     
-    # 关键词组合统计
-    print("\n关键词组合统计:")
-    print(f"同时包含PPD和沉积物: {sum(1 for r in results if r['PPD'] and r['Sediment'])}")
-    print(f"同时包含PPD和水体: {sum(1 for r in results if r['PPD'] and r['Water'])}")
-    print(f"同时包含PPD和生物: {sum(1 for r in results if r['PPD'] and r['Biological'])}")
-    print(f"同时包含所有环境介质: {sum(1 for r in results if r['Sediment'] and r['Water'] and r['Biological'])}")
-    print("="*120)
+    outputs = finish_outputs(output_csv, results, totals, output_dir, profiler, plot_job)
+    outputs["file_totals"] = rows
+    return outputs
+
+def start_plots(results, totals, output_dir, profiler=None, plots=True):
+    """在子进程中开始生成图表（数据未变化的图表直接沿用），plots 为 False 时返回None"""
+    if not plots:
+        return None
+    with profile_stage(profiler, "plots_start"):
+        return PlotJob(results, totals, output_dir)
+
+def finish_outputs(csv_path, results, totals, output_dir, profiler=None, plot_job=None):
+    """输出统计摘要和共现矩阵，等待图表生成完毕，返回结果文件信息（plot_job 为None时没有图表）"""
+    # 统计摘要及共现矩阵（与子进程绘图同时进行）
+    print_statistics(totals)
+    with profile_stage(profiler, "cooccurrence"):
+        cooccurrence_path = save_cooccurrence(csv_path, totals)
+    print(f"共现矩阵已保存到: {cooccurrence_path}")
+    
+    signal_path = summary_path = None
+    if plot_job is not None:
+        # 只计入主进程等待绘图子进程的时间（子进程的CPU时间单独统计）
+        with profile_stage(profiler, "plots_wait"):
+            paths = plot_job.wait()
+        signal_path, summary_path = paths["signal"], paths["summary"]
     
     return {
-        "csv_path": output_csv,
+        "csv_path": csv_path,
         "signal_plot": signal_path,
         "summary_plot": summary_path,
-        "results": results
+        "results": results,
+        "totals": totals
     }
 
 def generate_html_report(output_dir, results):
@@ -438,11 +860,15 @@ def generate_html_report(output_dir, results):
     report_path = os.path.join(output_dir, "analysis_report.html")
     
     # 提取统计数据
-    total_papers = len(results["results"])
-    ppd_count = sum(1 for r in results["results"] if r['PPD'])
-    sediment_count = sum(1 for r in results["results"] if r['Sediment'])
-    water_count = sum(1 for r in results["results"] if r['Water'])
-    bio_count = sum(1 for r in results["results"] if r['Biological'])
+    total_papers = results["totals"]["total"]
+    counts = results["totals"]["counts"]
+    
+    # 每个类别一张统计卡片
+    category_cards = "".join(f"""
+                    <div class="stat-card">
+                        <div class="stat-value">{counts[name]}</div>
+                        <div class="stat-label">包含{LEXICON.label(name)}的文献</div>
+                    </div>""" for name in CATEGORY_NAMES)
     
     # 生成HTML内容
     html_content = f"""
@@ -482,19 +908,7 @@ def generate_html_report(output_dir, results):
                     <div class="stat-card">
                         <div class="stat-value">{total_papers}</div>
                         <div class="stat-label">总文献数</div>
-                    </div>
-                    <div class="stat-card">
-                        <div class="stat-value">{ppd_count}</div>
-                        <div class="stat-label">包含PPD的文献</div>
-                    </div>
-                    <div class="stat-card">
-                        <div class="stat-value">{sediment_count}</div>
-                        <div class="stat-label">包含沉积物的文献</div>
-                    </div>
-                    <div class="stat-card">
-                        <div class="stat-value">{water_count}</div>
-                        <div class="stat-label">包含水体的文献</div>
-                    </div>
+                    </div>{category_cards}
                 </div>
             </div>
             
@@ -539,21 +953,89 @@ def generate_html_report(output_dir, results):
     return report_path
 
 if __name__ == "__main__":
-    # 设置HTML文件路径
-    html_file = input("请输入包含多篇文献的HTML文件路径: ").strip()
+    parser = argparse.ArgumentParser(description="WOS文献摘要关键词分析")
+    parser.add_argument("inputs", nargs="*", metavar="html_file",
+                        help="WOS导出HTML文件、语料库文件、包含导出文件的目录或通配符（可给出多个；省略时交互输入）")
+    parser.add_argument("-o", "--output-dir", help="结果保存目录（默认 ./results）")
+    parser.add_argument("--workers", type=int, default=1, help="并行分析的进程数（默认1，即串行分析）")
+    parser.add_argument("--cache", help=f"分析缓存文件路径（默认为结果目录中的 {CACHE_FILENAME}）")
+    parser.add_argument("--no-cache", action="store_true", help="不使用分析缓存，所有记录重新分析")
+    parser.add_argument("--append", metavar="CSV", help="增量模式：只分析新导出文件中未出现过的文献，追加到已有的结果CSV")
+    parser.add_argument("--backend", choices=list(BACKENDS),
+                        help=f"关键词匹配后端（默认 {DEFAULT_BACKEND}，各后端的检测结果相同，也可用环境变量 {BACKEND_ENV} 指定）")
+    parser.add_argument("--no-plots", action="store_true",
+                        help="只输出CSV和统计数据，不生成信号图、统计图和HTML报告（不导入 matplotlib）")
+    parser.add_argument("--profile", action="store_true",
+                        help="记录各阶段的耗时、CPU时间、峰值内存和处理速度，保存为结果CSV旁的 _profile.json")
+    parser.add_argument("--parquet", action="store_true",
+                        help="另存一份含完整摘要的列式结果文件（Parquet，与结果CSV同名，需安装 pyarrow）")
+    parser.add_argument("--dedup", action="store_true",
+                        help="分析之前去除各导出文件之间（及文件内部）的重复文献：DOI相同，没有DOI时归一化标题相同")
+    parser.add_argument("--near-dedup", action="store_true",
+                        help="分析之前按摘要的 MinHash 签名将近似重复的文献聚类，每个聚类只保留最先出现的一篇")
+    parser.add_argument("--near-dedup-threshold", type=float, metavar="THRESHOLD",
+                        help=f"近似重复的估计 Jaccard 相似度阈值（默认 {NEAR_THRESHOLD}；给出时即启用 --near-dedup）")
+    parser.add_argument("--evidence", action="store_true",
+                        help="记录每个检测项命中的关键词、位置和上下文片段，保存为 _evidence.parquet（需安装 pyarrow）")
+    args = parser.parse_args()
+    near_dedup = args.near_dedup_threshold
+    if near_dedup is None and args.near_dedup:
+        near_dedup = NEAR_THRESHOLD
+    if near_dedup is not None and not 0 < near_dedup <= 1:
+        print(f"错误: 近似重复阈值 {near_dedup} 应在 0 到 1 之间")
+        sys.exit(1)
+    
+    if args.inputs:
+        # 给出输入文件时不再交互提问，可在定时任务中无人值守运行
+        html_files = expand_inputs(args.inputs)
+        output_dir = args.output_dir or "./results"
+    else:
+        # 设置HTML文件路径
+        html_files = [input("请输入包含多篇文献的HTML文件（或语料库文件）路径: ").strip()]
+        
+        # 设置输出目录
+        output_dir = args.output_dir or input("请输入结果保存目录: ").strip() or "./results"
+    
+    if args.backend:
+        select_backend(args.backend)
     
-    # 设置输出目录
-    output_dir = input("请输入结果保存目录: ").strip() or "./results"
+    # 增量模式下结果保存在已有CSV所在目录
+    if args.append:
+        output_dir = os.path.dirname(args.append) or "."
     
     # 验证路径
-    if not os.path.isfile(html_file):
-        print(f"错误: 文件 '{html_file}' 不存在")
+    missing = [path for path in html_files if not os.path.isfile(path)]
+    for path in missing:
+        print(f"错误: 文件 '{path}' 不存在")
+    if args.append and not os.path.isfile(args.append):
+        print(f"错误: 结果文件 '{args.append}' 不存在")
+        missing.append(args.append)
+    if missing:
+        sys.exit(1)
+    
+    # 处理文件
+    workers = max(1, args.workers)
+    cache_path = None if args.no_cache else (args.cache or os.path.join(output_dir, CACHE_FILENAME))
+    profiler = StageProfiler() if args.profile else None
+    options = dict(workers=workers, cache_path=cache_path, profiler=profiler, plots=not args.no_plots,
+                   parquet=args.parquet, evidence=args.evidence, dedup=args.dedup,
+                   near_dedup=near_dedup)
+    if args.append:
+        results = append_html_file(html_files if len(html_files) > 1 else html_files[0], args.append, **options)
+    elif len(html_files) > 1:
+        results = process_batch(html_files, output_dir, **options)
     else:
-        # 处理文件
-        results = process_html_file(html_file, output_dir)
-        
-        # 生成HTML报告
-        if results:
+        results = process_html_file(html_files[0], output_dir, **options)
+    
+    # 生成HTML报告
+    if results and not args.no_plots:
+        with profile_stage(profiler, "report"):
             generate_html_report(output_dir, results)
-        
-        print("\n分析完成！所有结果已保存到指定目录。")
\ No newline at end of file
+    
+    # 保存各阶段耗时
+    if results and profiler is not None:
+        profiler.print_summary()
+        profile_path = profiler.save(os.path.splitext(results["csv_path"])[0] + "_profile.json")
+        print(f"各阶段耗时已保存到: {profile_path}")
+    
+    print("\n分析完成！所有结果已保存到指定目录。")
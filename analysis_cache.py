@@ -0,0 +1,95 @@
+import json
+import sqlite3
+import hashlib
+
+# 单次查询的键数量上限（低于 SQLite 默认的参数个数限制）
+QUERY_BATCH = 500
+
+
+def lexicon_version(*parts):
+    """由词表、窗口大小等分析参数计算版本号，任一关键词变化都会得到不同的版本"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def content_key(text):
+    """摘要内容的哈希键，忽略大小写和空白差异"""
+    normalized = ' '.join(text.lower().split())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """基于 SQLite 的逐条分析结果缓存
+
+    以摘要内容的哈希为键保存各检测项结果（按位压缩为一个整数），
+    摘要未变的记录可直接复用上次的结果。数据库中记录了词表版本，
+    打开时版本不一致（任一关键词列表被修改）会自动清空旧结果。
+    """
+
+    def __init__(self, path, version, flag_names):
+        self.version = version
+        self.flag_names = tuple(flag_names)
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS records (key TEXT PRIMARY KEY, flags INTEGER NOT NULL)"
+        )
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is None or row[0] != version:
+            self._conn.execute("DELETE FROM records")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (version,)
+            )
+        self._conn.commit()
+
+    def _pack(self, flags):
+        value = 0
+        for bit, flag in enumerate(flags):
+            if flag:
+                value |= 1 << bit
+        return value
+
+    def _unpack(self, value):
+        return tuple(bool(value >> bit & 1) for bit in range(len(self.flag_names)))
+
+    def get_many(self, texts):
+        """批量查询，返回 {文本: 检测结果元组}，未缓存的文本不出现在结果中"""
+        keys = {}
+        for text in texts:
+            keys.setdefault(content_key(text), []).append(text)
+        found = {}
+        key_list = list(keys)
+        for offset in range(0, len(key_list), QUERY_BATCH):
+            batch = key_list[offset:offset + QUERY_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, flags FROM records WHERE key IN ({placeholders})", batch
+            )
+            for key, value in rows:
+                flags = self._unpack(value)
+                for text in keys[key]:
+                    found[text] = flags
+        self.hits += len(found)
+        self.misses += len(set(texts)) - len(found)
+        return found
+
+    def put_many(self, items):
+        """批量写入 (文本, 检测结果元组)"""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO records (key, flags) VALUES (?, ?)",
+            [(content_key(text), self._pack(flags)) for text, flags in items]
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,307 @@
+import os
+import re
+import sys
+import csv
+import json
+import argparse
+import tempfile
+import subprocess
+
+# 基准测试使用的导出文件和参考结果（与本脚本位于同一目录）
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INPUTS = os.path.join(BASE_DIR, '目标文献')
+DEFAULT_REFERENCE_DIR = os.path.join(BASE_DIR, '文献保存')
+DEFAULT_BASELINE = os.path.join(BASE_DIR, 'benchmark_baseline.json')
+
+# 默认的放大倍数：原始数据，以及重复10次、100次得到的合成数据
+DEFAULT_SCALES = (1, 10, 100)
+
+# 处理速度低于基准值的比例超过该阈值时判定为性能退化
+DEFAULT_THRESHOLD = 0.25
+
+# 各阶段的名称及显示顺序（各匹配后端的对比阶段名为 "backend:<后端名>"）
+STAGES = ('extract', 'analyze', 'write_csv', 'plots')
+
+# 对比各匹配后端时使用的文献数（逐模式搜索的 re 后端比其他后端慢约两个数量级）
+DEFAULT_BACKEND_SAMPLE = 1000
+
+# 大小写校验：取前 CASE_SAMPLE 篇摘要的大小写变体，连同 CASE_PROBES 中含非ASCII字符的文本，
+# 检查各后端的结果与原始实现（每个模式以 re.IGNORECASE 搜索）相同
+CASE_SAMPLE = 100
+CASE_PROBES = (
+    "the river water had 5 µg/l",
+    "SEDIMENT CONCENTRATIONS OF PPD REACHED 3 ΜG/KG",
+    "p-phenylenediamine was found in fish tissue at 2 µg/kg",
+    "ΤΗΕ WATER LEVEL OF Ρ-PHENYLENEDIAMINE",
+)
+
+# 微符号 µ（U+00B5）与希腊字母 μ（U+03BC）互换
+MU_SWAP = str.maketrans({'\u00b5': '\u03bc', '\u03bc': '\u00b5'})
+
+
+def reference_paths(reference_dir):
+    """参考结果CSV（文献保存/1.csv、2.csv……），按编号排序"""
+    names = [name for name in os.listdir(reference_dir)
+             if name.lower().endswith('.csv') and os.path.splitext(name)[0].isdigit()]
+    return [os.path.join(reference_dir, name) for name in sorted(names, key=lambda n: int(os.path.splitext(n)[0]))]
+
+
+def load_reference_flags(reference_dir, flag_columns):
+    """读取参考结果中的各检测项，按文件编号顺序拼接为一个列表（每篇文献一个元组）"""
+    flags = []
+    for path in reference_paths(reference_dir):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                flags.append(tuple(row[column] == '1' for column in flag_columns))
+    return flags
+
+
+def case_variants(text):
+    """文本的大小写变体：逐字符转为大写（只转换大写后仍为单个字符的字符），以及 µ 与 μ 互换"""
+    upper = ''.join(ch.upper() if len(ch.upper()) == 1 else ch for ch in text)
+    return [upper, text.translate(MU_SWAP)]
+
+
+def ignorecase_flags(lexicon, text):
+    """按原始实现检测文本：每个关键词、每个 (上下文词, 浓度词) 组合以 re.IGNORECASE 单独搜索"""
+    from matcher import proximity_source
+
+    found = {name for name, patterns in lexicon.keywords.items()
+             if any(re.search(p, text, re.IGNORECASE) for p in patterns)}
+    flags = [name in found for name in lexicon.category_names]
+    for name in lexicon.concentration_categories:
+        flags.append(name in found and any(
+            re.search(proximity_source(word, term, lexicon.window), text, re.IGNORECASE)
+            for word in lexicon.keywords[name] for term in lexicon.concentration_terms
+        ))
+    return tuple(flags)
+
+
+def scaled_articles(articles, scale):
+    """将文献列表重复 scale 次，记录连续编号（合成的放大数据）"""
+    index = 0
+    for _ in range(scale):
+        for article in articles:
+            index += 1
+            copy = dict(article)
+            copy['index'] = index
+            yield copy
+
+
+def run_scale(html_files, scale, reference_dir, workers, backend_sample=0):
+    """在当前进程中按给定放大倍数运行各阶段，返回各阶段的耗时、速度和内存以及结果校验情况"""
+    import NERRE
+    from profiler import StageProfiler
+
+    profiler = StageProfiler()
+    with tempfile.TemporaryDirectory(prefix='benchmark_') as output_dir:
+        report = _run_stages(NERRE, profiler, html_files, scale, reference_dir, workers, backend_sample, output_dir)
+    return report
+
+
+def _run_stages(NERRE, profiler, html_files, scale, reference_dir, workers, backend_sample, output_dir):
+    """依次运行各阶段，图表和CSV写入临时目录 output_dir"""
+    # 读取解析：第一遍保留文献信息供后续阶段使用，其余各遍只计数
+    with profiler.stage('extract') as stage:
+        articles = list(NERRE.extract_articles(html_files))
+        count = len(articles)
+        for _ in range(scale - 1):
+            count += sum(1 for _ in NERRE.extract_articles(html_files))
+        stage['records'] = count
+
+    with profiler.stage('analyze') as stage:
+        results = NERRE.analyze_articles(scaled_articles(articles, scale), workers=workers)
+        stage['records'] = len(results)
+
+    # 与参考结果逐篇比较检测项（放大数据中的每一份都应与参考结果相同）
+    drift = None
+    reference = None
+    if reference_dir:
+        reference = load_reference_flags(reference_dir, NERRE.FLAG_COLUMNS)
+        flags = [tuple(row) for row in results.flags.tolist()]
+        if len(reference) != len(articles):
+            drift = {"records": len(articles), "reference_records": len(reference), "mismatches": None}
+        else:
+            mismatches = sum(1 for i, row in enumerate(flags) if row != reference[i % len(reference)])
+            drift = {"records": len(flags), "reference_records": len(reference), "mismatches": mismatches}
+
+    # 各匹配后端（NERRE、OCRIII、OCRII 共用）对同一批摘要的检测速度及结果，只在最小的放大倍数中运行
+    backend_drift = {}
+    case_drift = {}
+    if backend_sample:
+        from matcher import BACKENDS
+        sample = articles[:backend_sample]
+        # 大小写变体的预期结果：摘要的变体与原摘要的参考结果相同，固定文本按原始实现计算
+        cases = [(text, ignorecase_flags(NERRE.LEXICON, text)) for text in CASE_PROBES]
+        if reference is not None and len(reference) == len(articles):
+            cases += [(text, reference[i]) for i, article in enumerate(articles[:CASE_SAMPLE])
+                      for text in case_variants(article['abstract'])]
+        for name in BACKENDS:
+            # 先构建后端，编译时间不计入检测耗时
+            NERRE.LEXICON.backend(name)
+            with profiler.stage(f'backend:{name}', len(sample)):
+                flags = [NERRE.LEXICON.detect(article['abstract'], name) for article in sample]
+            if reference is not None and len(reference) == len(articles):
+                backend_drift[name] = sum(1 for i, row in enumerate(flags) if row != reference[i])
+            case_drift[name] = sum(1 for text, expected in cases if NERRE.LEXICON.detect(text, name) != expected)
+
+    with profiler.stage('write_csv', len(results)):
+        NERRE.write_results_csv(os.path.join(output_dir, 'benchmark.csv'), results)
+
+    with profiler.stage('plots', len(results)):
+        NERRE.generate_signal_plot(results, output_dir)
+        NERRE.generate_summary_plot(NERRE.compute_totals(results), output_dir)
+
+    report = profiler.to_dict()
+    report["scale"] = scale
+    report["drift"] = drift
+    report["backend_drift"] = backend_drift
+    report["case_drift"] = case_drift
+    return report
+
+
+def run_scale_process(html_files, scale, reference_dir, workers, backend_sample=0):
+    """在单独的子进程中运行一个放大倍数，使各放大倍数的峰值内存互不影响"""
+    with tempfile.TemporaryDirectory(prefix='benchmark_') as temp_dir:
+        output = os.path.join(temp_dir, 'report.json')
+        command = [sys.executable, os.path.abspath(__file__), '--run-scale', str(scale),
+                   '--report', output, '--workers', str(workers), '--backend-sample', str(backend_sample),
+                   '--reference-dir', reference_dir or '', *html_files]
+        # 子进程的输出（图表路径等）不需要显示
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        with open(output, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+def compare_baseline(reports, baseline, threshold):
+    """与基准结果比较各阶段的处理速度，返回退化项的说明列表"""
+    regressions = []
+    base_reports = {str(report["scale"]): report for report in baseline.get("reports", [])}
+    for report in reports:
+        base = base_reports.get(str(report["scale"]))
+        if base is None:
+            continue
+        for name, stage in report["stages"].items():
+            base_rate = base["stages"].get(name, {}).get("records_per_second")
+            rate = stage.get("records_per_second")
+            if base_rate and rate and rate < base_rate * (1 - threshold):
+                regressions.append(
+                    f"{report['scale']}x {name}: {rate:.0f} 篇/秒，基准 {base_rate:.0f} 篇/秒"
+                    f"（下降 {1 - rate / base_rate:.0%}）"
+                )
+    return regressions
+
+
+def print_report(report):
+    print(f"\n放大倍数 {report['scale']}x:")
+    print(f"  {'阶段':<20}{'文献数':>10}{'耗时(秒)':>12}{'篇/秒':>12}{'峰值内存(MB)':>16}")
+    names = list(STAGES) + [name for name in report["stages"] if name.startswith('backend:')]
+    for name in names:
+        stage = report["stages"].get(name)
+        if stage is None:
+            continue
+        rate = stage.get("records_per_second")
+        print(f"  {name:<20}{stage['records'] or 0:>10}{stage['wall_seconds']:>12.3f}"
+              f"{rate if rate is not None else 0:>12.0f}{stage['peak_rss_mb'] or 0:>16}")
+    drift = report["drift"]
+    if drift is None:
+        print("  未与参考结果比较")
+    elif drift["mismatches"] is None:
+        print(f"  结果校验失败: 文献数 {drift['records']} 与参考结果 {drift['reference_records']} 不一致")
+    elif drift["mismatches"]:
+        print(f"  结果校验失败: {drift['mismatches']}/{drift['records']} 篇文献的检测项与参考结果不同")
+    else:
+        print(f"  结果校验通过: {drift['records']} 篇文献的检测项与参考结果一致")
+    for name, mismatches in report["backend_drift"].items():
+        if mismatches:
+            print(f"  结果校验失败: 匹配后端 {name} 有 {mismatches} 篇文献的检测项与参考结果不同")
+    for name, mismatches in report["case_drift"].items():
+        if mismatches:
+            print(f"  结果校验失败: 匹配后端 {name} 有 {mismatches} 段大小写变体文本的检测项与 re.IGNORECASE 不同")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="文献关键词分析基准测试")
+    parser.add_argument("inputs", nargs="*", metavar="html_file",
+                        help=f"WOS导出HTML文件、目录或通配符（默认 {DEFAULT_INPUTS}）")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES),
+                        help="放大倍数（默认 1 10 100）")
+    parser.add_argument("--workers", type=int, default=1, help="分析阶段的进程数（默认1）")
+    parser.add_argument("--reference-dir",
+                        help="参考结果CSV所在目录（使用默认导出文件时默认为 文献保存），为空时不校验结果")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基准结果文件（默认 benchmark_baseline.json）")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基准结果")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="处理速度低于基准值超过该比例时判定为退化（默认0.25）")
+    parser.add_argument("-o", "--output", help="将本次结果保存为JSON文件")
+    parser.add_argument("--backend-sample", type=int, default=DEFAULT_BACKEND_SAMPLE,
+                        help=f"对比各匹配后端时使用的文献数（默认{DEFAULT_BACKEND_SAMPLE}，为0时不对比）")
+    parser.add_argument("--run-scale", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--report", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    from wos_reader import expand_inputs
+    html_files = expand_inputs(args.inputs or [DEFAULT_INPUTS])
+    reference_dir = args.reference_dir
+    if reference_dir is None and not args.inputs:
+        # 参考结果只对应自带的导出文件
+        reference_dir = DEFAULT_REFERENCE_DIR
+
+    if args.run_scale:
+        # 子进程：运行单个放大倍数并写出结果
+        report = run_scale(html_files, args.run_scale, reference_dir, max(1, args.workers), args.backend_sample)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False)
+        sys.exit(0)
+
+    missing = [path for path in html_files if not os.path.isfile(path)]
+    for path in missing:
+        print(f"错误: 文件 '{path}' 不存在")
+    if missing:
+        sys.exit(1)
+
+    print(f"基准测试: {len(html_files)} 个文件，放大倍数 {' '.join(f'{s}x' for s in args.scales)}")
+    reports = []
+    failures = []
+    for scale in args.scales:
+        # 各匹配后端的对比与数据量无关，只在最小的放大倍数中运行一次
+        backend_sample = args.backend_sample if scale == min(args.scales) else 0
+        report = run_scale_process(html_files, scale, reference_dir, max(1, args.workers), backend_sample)
+        print_report(report)
+        reports.append(report)
+        drift = report["drift"]
+        if drift is not None and drift["mismatches"] != 0:
+            failures.append(f"{scale}x 检测结果与参考结果不一致")
+        for name, mismatches in report["backend_drift"].items():
+            if mismatches:
+                failures.append(f"匹配后端 {name} 的检测结果与参考结果不一致")
+        for name, mismatches in report["case_drift"].items():
+            if mismatches:
+                failures.append(f"匹配后端 {name} 对大小写变体的检测结果与 re.IGNORECASE 不一致")
+
+    if os.path.isfile(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_baseline(reports, baseline, args.threshold)
+        if regressions:
+            print("\n处理速度退化:")
+            for line in regressions:
+                print(f"  {line}")
+            failures.extend(regressions)
+        else:
+            print(f"\n处理速度与基准结果相比没有超过 {args.threshold:.0%} 的退化")
+
+    result = {"inputs": html_files, "reports": reports}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到: {args.output}")
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"基准结果已保存到: {args.baseline}")
+
+    if failures:
+        print(f"\n基准测试未通过（{len(failures)} 项）")
+        sys.exit(1)
+    print("\n基准测试通过")
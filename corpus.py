@@ -0,0 +1,117 @@
+import os
+import sys
+import argparse
+from wos_reader import iter_articles, expand_inputs
+
+# 语料库文件扩展名：以此结尾的输入文件按语料库读取，不再解析HTML
+CORPUS_SUFFIX = '.parquet'
+
+# 语料库中保存的列（摘要为完整摘要，与解析HTML得到的文献信息相同）
+CORPUS_COLUMNS = ('index', 'doi', 'title', 'authors', 'year', 'abstract', 'source')
+
+# 列压缩算法
+CORPUS_COMPRESSION = 'zstd'
+
+# 每次写入的记录数（一个行组）
+WRITE_BATCH = 2000
+
+
+def is_corpus(path):
+    """是否为语料库文件"""
+    return os.fspath(path).lower().endswith(CORPUS_SUFFIX)
+
+
+def corpus_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [('index', pa.int64())] + [(name, pa.string()) for name in CORPUS_COLUMNS[1:]]
+    )
+
+
+def build_corpus(html_paths, corpus_path, batch_size=WRITE_BATCH):
+    """将一个或多个WOS导出文件转换为一个语料库文件（Parquet，按列压缩），返回记录数
+
+    各文件的记录连续编号，source 列记录其来源文件名。边解析边分批写入，
+    内存中最多保留一批记录；写完后再替换目标文件，中途出错不会留下不完整的语料库。
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if isinstance(html_paths, (str, os.PathLike)):
+        html_paths = [html_paths]
+    schema = corpus_schema()
+    temp_path = f"{corpus_path}.{os.getpid()}.tmp"
+    count = 0
+    try:
+        with pq.ParquetWriter(temp_path, schema, compression=CORPUS_COMPRESSION) as writer:
+            batch = {name: [] for name in CORPUS_COLUMNS}
+            for path in html_paths:
+                source = os.path.basename(path)
+                for article in iter_articles(path):
+                    count += 1
+                    article['index'] = count
+                    article['source'] = source
+                    for name in CORPUS_COLUMNS:
+                        batch[name].append(article[name])
+                    if len(batch['index']) >= batch_size:
+                        writer.write_batch(pa.record_batch(batch, schema=schema))
+                        batch = {name: [] for name in CORPUS_COLUMNS}
+            if batch['index']:
+                writer.write_batch(pa.record_batch(batch, schema=schema))
+        os.replace(temp_path, corpus_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return count
+
+
+def iter_corpus(corpus_path):
+    """逐条产出语料库中的文献信息字典（字段与 wos_reader.iter_articles 相同）"""
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(corpus_path).iter_batches(columns=list(CORPUS_COLUMNS)):
+        yield from batch.to_pylist()
+
+
+def read_corpus_column(corpus_path, name):
+    """只读取语料库中的一列（如 DOI），返回列表"""
+    import pyarrow.parquet as pq
+
+    return pq.ParquetFile(corpus_path).read(columns=[name]).column(name).to_pylist()
+
+
+def iter_inputs(paths):
+    """依次读取一个或多个输入文件（WOS导出HTML或语料库），逐条产出文献信息，记录连续编号"""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    index = 0
+    for path in paths:
+        for article in (iter_corpus(path) if is_corpus(path) else iter_articles(path)):
+            index += 1
+            article['index'] = index
+            yield article
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="将WOS导出HTML文件转换为语料库文件（Parquet）")
+    parser.add_argument("inputs", nargs="+", metavar="html_file", help="WOS导出HTML文件、包含导出文件的目录或通配符")
+    parser.add_argument("-o", "--output", help="语料库文件路径（默认与单个输入文件同名，多个输入文件时为 corpus.parquet）")
+    args = parser.parse_args()
+
+    html_files = expand_inputs(args.inputs)
+    missing = [path for path in html_files if not os.path.isfile(path)]
+    for path in missing:
+        print(f"错误: 文件 '{path}' 不存在")
+    if missing:
+        sys.exit(1)
+
+    if args.output:
+        output = args.output
+    elif len(html_files) == 1:
+        output = os.path.splitext(html_files[0])[0] + CORPUS_SUFFIX
+    else:
+        output = "corpus" + CORPUS_SUFFIX
+
+    count = build_corpus(html_files, output)
+    print(f"已将 {len(html_files)} 个文件中的 {count} 篇文献保存到语料库: {output}")
@@ -0,0 +1,253 @@
+import csv
+import zlib
+import hashlib
+import numpy as np
+from wos_reader import article_doi, article_title, clean_text, NON_WORD
+
+# 哈希索引中每个键保存的摘要字节数（8字节，数十万条记录的碰撞概率可以忽略）
+KEY_DIGEST_SIZE = 8
+
+# 近似重复检测（MinHash + LSH）：摘要按连续 SHINGLE_WORDS 个词切分为词组（shingle），
+# 每篇摘要以 MINHASH_PERMUTATIONS 个最小哈希值作为签名，两篇摘要签名中相同位置相等的比例即其词组集合
+# Jaccard 相似度的估计值
+SHINGLE_WORDS = 3
+MINHASH_PERMUTATIONS = 128
+
+# 签名分为 LSH_BANDS 段（每段 MINHASH_PERMUTATIONS // LSH_BANDS 个值），任一段完全相同的摘要才作为候选比较；
+# 16段×8个值时，相似度0.8的摘要成为候选的概率约为0.9995，相似度0.5的约为0.06
+LSH_BANDS = 16
+
+# 默认的近似重复阈值（估计的 Jaccard 相似度）
+NEAR_THRESHOLD = 0.8
+
+# 词数少于该值的摘要（包括没有摘要的文献）不参与近似重复检测，以免短摘要或空摘要被误判为重复
+NEAR_MIN_WORDS = 20
+
+# 每个分段桶中保留的文献数上限：大量摘要共用同一段签名时（如相同的模板文字），每篇新摘要最多与
+# LSH_BANDS × LSH_BUCKET_LIMIT 篇比较，总耗时仍与记录数成正比
+LSH_BUCKET_LIMIT = 64
+
+# 哈希函数的固定随机种子，使同一摘要在不同运行中得到相同的签名
+MINHASH_SEED = 20240601
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=KEY_DIGEST_SIZE).digest()
+
+
+class DuplicateFilter:
+    """去重器的公共部分：逐篇过滤文献，按来源文件统计读取和去除的记录数，输出并保存统计
+
+    子类实现 is_duplicate(article, source)，并给出打印统计时的标题 REPORT_TITLE
+    和统计文件的后缀 REPORT_SUFFIX（<结果名><后缀>）。
+    """
+
+    def __init__(self):
+        # {来源文件: [读取的记录数, 去除的记录数]}，按首次出现的顺序排列
+        self.stats = {}
+
+    def is_duplicate(self, article, source=''):
+        """判断来自 source 的文献是否应去除，不去除时登记该文献"""
+        raise NotImplementedError
+
+    def filter(self, articles, source=''):
+        """原样产出不重复的文献（生成器），并记入来源文件 source 的统计"""
+        stats = self.stats.setdefault(source, [0, 0])
+        for article in articles:
+            stats[0] += 1
+            if self.is_duplicate(article, source):
+                stats[1] += 1
+                continue
+            yield article
+
+    @property
+    def dropped(self):
+        """去除的重复记录总数"""
+        return sum(dropped for _, dropped in self.stats.values())
+
+    def print_report(self):
+        print(f"\n{self.REPORT_TITLE}:")
+        for source, (records, dropped) in self.stats.items():
+            print(f"  {source}: 读取 {records} 篇，去除重复 {dropped} 篇，保留 {records - dropped} 篇")
+        total = sum(records for records, _ in self.stats.values())
+        print(f"  合计: 读取 {total} 篇，去除重复 {self.dropped} 篇，保留 {total - self.dropped} 篇")
+
+    def save_report(self, path):
+        """将各文件的去重统计保存为CSV"""
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['File', 'Records', 'Dropped', 'Kept'])
+            for source, (records, dropped) in self.stats.items():
+                writer.writerow([source, records, dropped, records - dropped])
+        return path
+
+
+class Deduplicator(DuplicateFilter):
+    """跨导出文件的文献去重（分析之前）
+
+    每篇文献的指纹优先取DOI，没有DOI时取归一化标题（与 wos_reader.article_key 使用相同的归一化）；
+    指纹以8字节哈希保存（DOI集合、标题字典），内存占用与记录数成正比，查询为常数时间。
+    DOI相同的文献重复；没有DOI的文献与之前任一同名文献重复。有DOI的文献与之前一篇没有DOI的同名文献
+    也视为重复（与两者出现的先后无关，同一对文献只保留一篇），但不同DOI的同名文献（如勘误）都会保留。
+    没有DOI也没有标题的文献总是保留。按来源文件分别统计读取和去除的记录数。
+    """
+
+    REPORT_TITLE = "重复文献去除情况"
+    REPORT_SUFFIX = "_dedup.csv"
+
+    def __init__(self):
+        super().__init__()
+        self._dois = set()
+        # {标题哈希: 是否已由有DOI的文献登记}
+        self._titles = {}
+
+    def is_duplicate(self, article, source=''):
+        """判断文献是否与之前出现过的文献重复，不重复时登记其指纹（指纹与来源文件无关）"""
+        doi = article_doi(article)
+        title = article_title(article)
+        title_hash = _digest(title) if title else None
+        if doi:
+            doi_hash = _digest(doi)
+            if doi_hash in self._dois:
+                return True
+            self._dois.add(doi_hash)
+            if title_hash is None:
+                return False
+            # 标题只由没有DOI的文献登记过：与那篇文献重复，此后该标题归有DOI的文献所有
+            duplicate = self._titles.get(title_hash) is False
+            self._titles[title_hash] = True
+            return duplicate
+        if title_hash is None:
+            return False
+        if title_hash in self._titles:
+            return True
+        self._titles[title_hash] = False
+        return False
+
+
+class _WordHashes(dict):
+    """词 -> 32位哈希（CRC32）的缓存，每个词只计算一次"""
+
+    def __missing__(self, word):
+        value = self[word] = zlib.crc32(word.encode('utf-8'))
+        return value
+
+
+class NearDuplicateIndex(DuplicateFilter):
+    """摘要近似重复文献的聚类与去除（分析之前）：MinHash 签名 + 局部敏感哈希（LSH）
+
+    精确指纹（DOI、标题）无法识别会议版本、勘误，以及空白或残留标记不同的同一摘要。
+    摘要先去除残留标记、转为小写并按词切分，每连续 SHINGLE_WORDS 个词的哈希构成词组集合；
+    签名按段登记在哈希桶中，新摘要只与至少一段签名相同的摘要比较（不做两两比较，
+    总耗时与记录数成正比），估计相似度不低于 threshold 时归入其所在的聚类。
+    每个聚类只保留最先出现的文献（代表文献），其余文献在分析和统计之前去除。
+    """
+
+    REPORT_TITLE = "近似重复文献去除情况"
+    REPORT_SUFFIX = "_near_duplicates.csv"
+
+    def __init__(self, threshold=NEAR_THRESHOLD, permutations=MINHASH_PERMUTATIONS, bands=LSH_BANDS):
+        super().__init__()
+        if permutations % bands:
+            raise ValueError(f"签名长度 {permutations} 不能被分段数 {bands} 整除")
+        self.threshold = threshold
+        self.bands = bands
+        self._rows = permutations // bands
+        rng = np.random.default_rng(MINHASH_SEED)
+        # 乘法移位哈希 h(x) = (a * x + b) >> 32（a 为奇数），每个签名位置一组 (a, b)
+        self._a = (rng.integers(0, 1 << 63, permutations, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, permutations, dtype=np.uint64)
+        self._word_hashes = _WordHashes()
+        self._buckets = {}
+        # 已登记摘要的签名，及其所在聚类的代表文献（签名序号）
+        self._signatures = []
+        self._representatives = []
+        # 已登记文献的 (来源文件, 文件中的编号, 标题)，用于输出聚类明细
+        self._records = []
+        # 去除的文献：(签名序号, 代表文献的签名序号, 估计相似度)
+        self.members = []
+
+    def _shingles(self, text):
+        """摘要的词组哈希（去重后的 uint64 数组），词数不足时返回None"""
+        words = NON_WORD.sub(' ', clean_text(text).lower()).split()
+        if len(words) < max(NEAR_MIN_WORDS, SHINGLE_WORDS):
+            return None
+        word_hashes = self._word_hashes
+        hashes = np.array([word_hashes[word] for word in words], dtype=np.uint64)
+        count = len(words) - SHINGLE_WORDS + 1
+        with np.errstate(over='ignore'):
+            shingles = hashes[:count].copy()
+            for offset in range(1, SHINGLE_WORDS):
+                shingles = (shingles << np.uint64(32)) ^ (shingles >> np.uint64(32)) ^ hashes[offset:offset + count]
+            # splitmix64 的混合步骤，使组合后的值在 64 位上均匀分布
+            shingles ^= shingles >> np.uint64(30)
+            shingles *= np.uint64(0xBF58476D1CE4E5B9)
+            shingles ^= shingles >> np.uint64(27)
+            shingles *= np.uint64(0x94D049BB133111EB)
+            shingles ^= shingles >> np.uint64(31)
+        return np.unique(shingles)
+
+    def signature(self, text):
+        """摘要的 MinHash 签名（uint32 数组），摘要过短时返回None"""
+        shingles = self._shingles(text)
+        if shingles is None:
+            return None
+        with np.errstate(over='ignore'):
+            values = self._a[:, None] * shingles[None, :] + self._b[:, None]
+        return (values.min(axis=1) >> np.uint64(32)).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        rows = self._rows
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, article, source=''):
+        """登记一篇文献，与已登记的摘要近似重复时返回 (代表文献的签名序号, 估计相似度)，否则返回None"""
+        signature = self.signature(article.get('abstract') or '')
+        if signature is None:
+            return None
+        keys = self._band_keys(signature)
+        candidates = set()
+        for key in keys:
+            candidates.update(self._buckets.get(key, ()))
+        best = None
+        best_similarity = self.threshold
+        for candidate in candidates:
+            similarity = np.count_nonzero(self._signatures[candidate] == signature) / len(signature)
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        number = len(self._signatures)
+        self._signatures.append(signature)
+        self._representatives.append(number if best is None else self._representatives[best])
+        self._records.append((source, article.get('index'), article.get('title') or ''))
+        for key in keys:
+            bucket = self._buckets.setdefault(key, [])
+            if len(bucket) < LSH_BUCKET_LIMIT:
+                bucket.append(number)
+        if best is None:
+            return None
+        representative = self._representatives[number]
+        self.members.append((number, representative, best_similarity))
+        return representative, best_similarity
+
+    def is_duplicate(self, article, source=''):
+        """近似重复的文献记入其代表文献所在的聚类"""
+        return self.add(article, source) is not None
+
+    @property
+    def clusters(self):
+        """含近似重复文献的聚类数"""
+        return len({representative for _, representative, _ in self.members})
+
+    def print_report(self):
+        super().print_report()
+        print(f"  近似重复聚类 {self.clusters} 个（相似度阈值 {self.threshold}）")
+
+    def save_report(self, path):
+        """将去除的文献及其代表文献保存为CSV（每行一篇去除的文献，编号为其在来源文件中的编号）"""
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['File', 'Record', 'Title', 'Representative File', 'Representative Record',
+                             'Representative Title', 'Similarity'])
+            for number, representative, similarity in self.members:
+                writer.writerow([*self._records[number], *self._records[representative], f"{similarity:.3f}"])
+        return path
@@ -0,0 +1,176 @@
+import os
+import json
+import pickle
+import hashlib
+from matcher import BACKENDS, DEFAULT_BACKEND
+
+# 默认词表文件（与本模块位于同一目录）
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicons.json')
+
+# 编译产物保存在词表文件旁，文件名为 <词表文件名><后缀>
+COMPILED_SUFFIX = '.compiled'
+
+# 编译逻辑（matcher 模块或本模块）修改时递增，使已保存的编译产物失效
+COMPILER_REVISION = 3
+
+# 通过环境变量选择匹配后端（如 LEXICON_BACKEND=alternation），对所有分析程序生效
+BACKEND_ENV = 'LEXICON_BACKEND'
+
+
+def flatten_keywords(keywords):
+    """词表可以是列表，也可以是 {分组说明: 列表}，按顺序展开为一个列表"""
+    if isinstance(keywords, dict):
+        return [keyword for group in keywords.values() for keyword in group]
+    return list(keywords)
+
+
+def lexicon_hash(config):
+    """词表内容的版本哈希：任一关键词、类别或窗口大小变化都会得到不同的值"""
+    payload = json.dumps([COMPILER_REVISION, config], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class Lexicon:
+    """由词表文件编译得到的关键词检测器
+
+    每个类别有名称、中文名称、绘图颜色和关键词列表；标记了 concentration 的类别
+    （环境介质）还会检测其关键词之后若干个单词内是否出现浓度关键词。
+    检测项依次为各类别，然后是各环境介质的浓度（名称为 "<类别>_Conc"）。
+    """
+
+    def __init__(self, config, version):
+        self.version = version
+        self.categories = []
+        self.keywords = {}
+        for category in config['categories']:
+            name = category['name']
+            if name in self.keywords:
+                raise ValueError(f"词表中的类别名称重复: {name}")
+            self.keywords[name] = flatten_keywords(category['keywords'])
+            self.categories.append({
+                'name': name,
+                'label': category.get('label', name),
+                'color': category.get('color'),
+                'concentration': bool(category.get('concentration', False))
+            })
+
+        concentration = config.get('concentration', {})
+        self.concentration_terms = flatten_keywords(concentration.get('terms', []))
+        self.window = concentration.get('window', 5)
+
+        self.category_names = [c['name'] for c in self.categories]
+        self.concentration_categories = [c['name'] for c in self.categories if c['concentration']]
+        self.flag_names = self.category_names + [f"{name}_Conc" for name in self.concentration_categories]
+
+        self._backends = {}
+        # 默认后端在编译时构建，随编译产物一起保存
+        self.use_backend(DEFAULT_BACKEND)
+
+    def __getstate__(self):
+        # 编译产物只保存默认后端，其余后端加载后按需构建
+        state = dict(self.__dict__)
+        state['_backends'] = {
+            name: backend for name, backend in self._backends.items() if name == DEFAULT_BACKEND
+        }
+        state['_active'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.use_backend(self.backend_name)
+
+    def concentration_contexts(self):
+        """各环境介质类别的关键词（浓度判断的上下文词）"""
+        return {name: self.keywords[name] for name in self.concentration_categories}
+
+    def backend(self, name=None):
+        """返回指定的匹配后端（省略时为当前后端），首次使用时构建"""
+        name = name or self.backend_name
+        if name not in BACKENDS:
+            raise ValueError(f"未知的匹配后端: {name}（可选: {', '.join(BACKENDS)}）")
+        backend = self._backends.get(name)
+        if backend is None:
+            backend = BACKENDS[name](self.keywords, self.concentration_contexts(),
+                                     self.concentration_terms, window=self.window)
+            self._backends[name] = backend
+        return backend
+
+    def use_backend(self, name):
+        """切换 detect 使用的匹配后端，各后端的检测结果相同"""
+        self._active = self.backend(name)
+        self.backend_name = name
+
+    def label(self, name):
+        """类别的中文名称"""
+        return self.categories[self.category_names.index(name)]['label']
+
+    def color(self, name, default=None):
+        """类别的绘图颜色"""
+        return self.categories[self.category_names.index(name)]['color'] or default
+
+    def detect(self, text, backend=None, evidence=None):
+        """检测一段文本，按 flag_names 的顺序返回各检测项结果（backend 省略时使用当前后端）
+
+        给定 evidence（列表）时，在同一次扫描中为每个命中的检测项追加一条
+        (检测项序号, 起点, 终点)，即该检测项第一处命中的关键词（浓度为介质词到浓度词的整段）在文本中的位置。
+        """
+        backend = self._active if backend is None else self.backend(backend)
+        spans = None if evidence is None else {}
+        found = backend.categories(text, spans)
+        flags = [name in found for name in self.category_names]
+        media = [name for name in self.concentration_categories if name in found]
+        near_spans = None if evidence is None else {}
+        if media:
+            # 只有出现了环境介质关键词时才需要判断浓度关键词的位置
+            near = backend.near(text, media, near_spans)
+            flags += [name in near for name in self.concentration_categories]
+        else:
+            flags += [False] * len(self.concentration_categories)
+        if evidence is not None:
+            offset = len(self.category_names)
+            evidence.extend((j, *spans[name]) for j, name in enumerate(self.category_names) if name in spans)
+            evidence.extend((offset + j, *near_spans[name])
+                            for j, name in enumerate(self.concentration_categories) if name in near_spans)
+        return tuple(flags)
+
+
+def compiled_path(path):
+    """词表文件对应的编译产物路径"""
+    return path + COMPILED_SUFFIX
+
+
+def load_lexicon(path=None, backend=None):
+    """读取词表文件，返回编译好的 Lexicon
+
+    编译结果连同词表的版本哈希以 pickle 形式保存在词表文件旁。词表未修改时
+    直接加载编译产物，不再重新拆分关键词和构建前缀树；词表修改后自动重新编译并覆盖。
+    backend 省略时使用环境变量 LEXICON_BACKEND 指定的匹配后端，未指定时为默认后端。
+    """
+    path = path or DEFAULT_LEXICON_PATH
+    backend = backend or os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    version = lexicon_hash(config)
+
+    artifact = compiled_path(path)
+    try:
+        with open(artifact, 'rb') as f:
+            lexicon = pickle.load(f)
+        if isinstance(lexicon, Lexicon) and lexicon.version == version:
+            lexicon.use_backend(backend)
+            return lexicon
+    except Exception:
+        # 编译产物不存在、已损坏或来自旧版本程序时重新编译
+        pass
+
+    lexicon = Lexicon(config, version)
+    try:
+        temp_path = f"{artifact}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            pickle.dump(lexicon, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, artifact)
+    except OSError:
+        # 词表所在目录不可写时不保存编译产物，每次启动重新编译
+        pass
+    lexicon.use_backend(backend)
+    return lexicon
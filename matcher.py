@@ -0,0 +1,334 @@
+import re
+
+# 正则模式的最小单元：转义字符、字符类或单个普通字符，后面可带量词
+_ATOM = re.compile(r'(?:\\.|\[(?:\\.|[^\]])*\]|[^\\\[\](){}|*+?])(?:[*+?]|\{\d*,?\d*\})?\??')
+
+
+# re.IGNORECASE 视为相同、但 str.lower() 之后仍不相同的字符（标准库 re 的大小写等价表），
+# 匹配前统一替换为同一个字符，如微符号 µ（U+00B5）与希腊字母 μ（U+03BC）
+CASE_EQUIVALENTS = {
+    '\u0130': 'i', '\u0131': 'i', '\u017f': 's', '\u00b5': '\u03bc',
+    '\u0345': '\u03b9', '\u1fbe': '\u03b9', '\u1fd3': '\u0390', '\u1fe3': '\u03b0',
+    '\u03d0': '\u03b2', '\u03f5': '\u03b5', '\u03d1': '\u03b8', '\u03f0': '\u03ba',
+    '\u03d6': '\u03c0', '\u03f1': '\u03c1', '\u03c2': '\u03c3', '\u03d5': '\u03c6',
+    '\u1e9b': '\u1e61', '\ufb05': '\ufb06',
+    '\u1c80': '\u0432', '\u1c81': '\u0434', '\u1c82': '\u043e', '\u1c83': '\u0441',
+    '\u1c84': '\u0442', '\u1c85': '\u0442', '\u1c86': '\u044a', '\u1c87': '\u0463', '\u1c88': '\ua64b',
+}
+CASE_FOLD = str.maketrans(CASE_EQUIVALENTS)
+
+
+def fold_text(text):
+    """将文本转为小写并统一大小写等价的字符，与 re.IGNORECASE 的判断相同
+
+    逐字符替换（İ 也替换为单个 i），长度不变，匹配位置与原文一一对应。
+    """
+    if text.isascii():
+        return text.lower()
+    return text.translate(CASE_FOLD).lower()
+
+
+def fold_case(pattern):
+    """将正则模式中的字面字符按 fold_text 转为小写，转义序列保持不变"""
+    out = []
+    escaped = False
+    for ch in pattern:
+        out.append(ch if escaped else fold_text(ch))
+        escaped = not escaped and ch == '\\'
+    return ''.join(out)
+
+
+def split_atoms(pattern):
+    """将正则模式拆分为最小单元，含分组或分支的模式无法拆分时返回None"""
+    atoms = []
+    pos = 0
+    while pos < len(pattern):
+        m = _ATOM.match(pattern, pos)
+        if not m:
+            return None
+        atoms.append(m.group())
+        pos = m.end()
+    return atoms
+
+
+def build_trie_pattern(entries, capture=True):
+    """将(模式, 标签)列表按公共前缀合并为前缀树形式的正则
+
+    返回 (正则源码, {分组名: 标签元组})。每个模式结尾放置一个空的命名分组，
+    匹配成功后通过 lastgroup 即可知道命中的是哪个标签；capture 为 False 时
+    不放置分组（只需判断是否命中时，便于嵌入更大的正则中）。
+    """
+    root = {}
+    opaque = {}
+    for pattern, label in entries:
+        atoms = split_atoms(pattern)
+        if atoms is None:
+            # 无法拆分的复杂模式整体作为一个分支
+            opaque.setdefault(pattern, []).append(label)
+            continue
+        node = root
+        for atom in atoms:
+            node = node.setdefault(atom, {})
+        node.setdefault(None, []).append(label)
+
+    terminals = {}
+
+    def terminal(labels):
+        if not capture:
+            return ""
+        name = f"t{len(terminals)}"
+        terminals[name] = tuple(dict.fromkeys(labels))
+        return f"(?P<{name}>)"
+
+    def emit(node):
+        # 先尝试更长的分支，当前结点作为结尾的情况放在最后
+        branches = [atom + emit(child) for atom, child in node.items() if atom is not None]
+        if None in node:
+            branches.append(terminal(node[None]))
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    branches = [atom + emit(child) for atom, child in root.items() if atom is not None]
+    branches += [f"(?:{pattern}){terminal(labels)}" for pattern, labels in opaque.items()]
+    return "|".join(branches), terminals
+
+
+def trie_source(patterns):
+    """将模式列表合并为不带分组的前缀树正则源码（模式应已转为小写）"""
+    source, _ = build_trie_pattern(((p, None) for p in patterns), capture=False)
+    return source
+
+
+def alternation_source(patterns):
+    """将模式列表依次连接为分支正则源码"""
+    return "|".join(f"(?:{p})" for p in patterns)
+
+
+def proximity_source(contexts, terms, window):
+    """上下文词之后隔 0~window 个单词出现目标词的正则源码（contexts、terms 为已合并的正则源码）"""
+    return fr"\b(?:{contexts})\W+(?:\w+\W+){{0,{window}}}?(?:{terms})\b"
+
+
+class KeywordMatcher:
+    """多类别关键词匹配器
+
+    所有类别的词表在构造时只编译一次：按公共前缀合并成一个前缀树正则（总扫描器），
+    另外为每个类别各编译一个前缀树正则用于定点校验。分析时对每篇摘要只做一次线性扫描
+    即可得到全部类别的命中情况，耗时取决于文本长度而不是关键词数量。
+
+    文本统一按 fold_text 转为小写后匹配，模式中的字面字符也预先转为小写，
+    以此代替 re.IGNORECASE（忽略大小写会让正则引擎失去首字符快速跳过的优化）。
+    """
+
+    def __init__(self, lexicons):
+        # lexicons: {类别名: [正则模式, ...]}，保持传入顺序
+        self.categories = list(lexicons)
+        self._patterns = {}
+        entries = []
+        for name in self.categories:
+            folded = [fold_case(p) for p in lexicons[name]]
+            source, _ = build_trie_pattern((p, name) for p in folded)
+            self._patterns[name] = re.compile(source)
+            entries.extend((p, name) for p in folded)
+        source, self._terminals = build_trie_pattern(entries)
+        self._scanner = re.compile(source)
+
+    def pattern(self, category):
+        """返回某个类别合并后的已编译模式（匹配小写文本）"""
+        return self._patterns[category]
+
+    def scan(self, text, spans=None):
+        """单次扫描文本，返回命中的类别集合
+
+        给定 spans（字典）时，在同一次扫描中记下各类别第一处命中的位置 {类别名: (起点, 终点)}。
+        """
+        found = set()
+        if not text:
+            return found
+
+        text = fold_text(text)
+        remaining = len(self.categories)
+        search = self._scanner.search
+        pos = 0
+        while remaining:
+            m = search(text, pos)
+            if m is None:
+                break
+            start = m.start()
+            for name in self._terminals[m.lastgroup]:
+                if name not in found:
+                    found.add(name)
+                    remaining -= 1
+                    if spans is not None:
+                        spans[name] = m.span()
+            # 同一位置可能同时命中多个类别的关键词，对尚未命中的类别在该位置做一次定点匹配
+            for name in self.categories:
+                if name not in found:
+                    hit = self._patterns[name].match(text, start)
+                    if hit:
+                        found.add(name)
+                        remaining -= 1
+                        if spans is not None:
+                            spans[name] = hit.span()
+            # 从下一个字符继续扫描，避免漏掉起始于当前匹配内部的其他类别关键词
+            pos = start + 1
+        return found
+
+    def contains(self, text, category):
+        """检查文本是否包含某个类别的关键词"""
+        if not text:
+            return False
+        return self._patterns[category].search(fold_text(text)) is not None
+
+
+class RegexBackend:
+    """逐个模式调用标准库 re 搜索的匹配后端（原始实现，作为其他后端的对照）
+
+    关键词检测对每个模式单独搜索；浓度判断为每个 (上下文词, 目标词) 组合构造
+    \\b上下文词\\W+(?:\\w+\\W+){0,N}?目标词\\b 并逐个搜索。
+    与其他后端相同，文本和模式都按 fold_text 转为小写后匹配，各后端的检测结果一致。
+    """
+
+    name = 're'
+
+    def __init__(self, keywords, contexts, terms, window=5):
+        # keywords: {类别名: [正则模式, ...]}；contexts: {环境介质类别名: [上下文模式, ...]}；terms: [目标词模式, ...]
+        self._keywords = {
+            name: [re.compile(fold_case(p)) for p in patterns] for name, patterns in keywords.items()
+        }
+        self._contexts = {name: [fold_case(p) for p in patterns] for name, patterns in contexts.items()}
+        self._terms = [fold_case(p) for p in terms]
+        self._window = window
+        self._pairs = {}
+
+    def _pair_patterns(self, category):
+        # 组合数量较多，首次用到某个类别时才编译
+        patterns = self._pairs.get(category)
+        if patterns is None:
+            patterns = [
+                re.compile(proximity_source(word, term, self._window))
+                for word in self._contexts[category] for term in self._terms
+            ]
+            self._pairs[category] = patterns
+        return patterns
+
+    def contains(self, text, category):
+        """检查文本是否包含某个类别的关键词"""
+        return bool(text) and any(p.search(fold_text(text)) for p in self._keywords[category])
+
+    @staticmethod
+    def _first_span(text, patterns):
+        # 各模式中最靠前的一处命中
+        hits = [m.span() for m in (p.search(text) for p in patterns) if m]
+        return min(hits) if hits else None
+
+    def categories(self, text, spans=None):
+        """返回文本中出现了关键词的类别集合（给定 spans 时同时记下各类别第一处命中的位置）"""
+        if not text:
+            return set()
+        text = fold_text(text)
+        if spans is None:
+            return {name for name, patterns in self._keywords.items() if any(p.search(text) for p in patterns)}
+        found = set()
+        for name, patterns in self._keywords.items():
+            span = self._first_span(text, patterns)
+            if span is not None:
+                found.add(name)
+                spans[name] = span
+        return found
+
+    def near(self, text, categories, spans=None):
+        """返回给定类别中，上下文词之后 N 个单词以内出现目标词的类别集合（spans 同上）"""
+        if not text:
+            return set()
+        text = fold_text(text)
+        if spans is None:
+            return {name for name in categories if any(p.search(text) for p in self._pair_patterns(name))}
+        found = set()
+        for name in categories:
+            span = self._first_span(text, self._pair_patterns(name))
+            if span is not None:
+                found.add(name)
+                spans[name] = span
+        return found
+
+
+class AlternationBackend:
+    """每个类别合并为一个分支正则的匹配后端
+
+    关键词检测每个类别搜索一次；浓度判断每个类别一个组合正则
+    \\b(?:上下文词|...)\\W+(?:\\w+\\W+){0,N}?(?:目标词|...)\\b，与逐对搜索的结果相同。
+    """
+
+    name = 'alternation'
+
+    # 模式合并方式，子类可替换
+    join = staticmethod(alternation_source)
+
+    def __init__(self, keywords, contexts, terms, window=5):
+        # 文本和模式中的字面字符统一按 fold_text 转为小写，代替 re.IGNORECASE
+        self._keywords = {
+            name: re.compile(self.join([fold_case(p) for p in patterns]))
+            for name, patterns in keywords.items()
+        }
+        terms = self.join([fold_case(p) for p in terms])
+        self._near = {
+            name: re.compile(proximity_source(self.join([fold_case(p) for p in patterns]), terms, window))
+            for name, patterns in contexts.items()
+        }
+
+    def contains(self, text, category):
+        return bool(text) and self._keywords[category].search(fold_text(text)) is not None
+
+    @staticmethod
+    def _search(text, patterns, names, spans):
+        # 每个类别搜索一次；给定 spans 时记下命中位置（转为小写后长度不变，即原文中的位置）
+        found = set()
+        for name in names:
+            m = patterns[name].search(text)
+            if m:
+                found.add(name)
+                if spans is not None:
+                    spans[name] = m.span()
+        return found
+
+    def categories(self, text, spans=None):
+        if not text:
+            return set()
+        return self._search(fold_text(text), self._keywords, self._keywords, spans)
+
+    def near(self, text, categories, spans=None):
+        if not text:
+            return set()
+        return self._search(fold_text(text), self._near, categories, spans)
+
+
+class TrieBackend(AlternationBackend):
+    """前缀树匹配后端（默认后端）
+
+    所有类别的关键词合并为一个前缀树正则（相当于由正则引擎执行的关键词自动机），
+    每篇文本只扫描一次即得到全部类别；浓度判断的上下文词和目标词也按公共前缀合并，
+    每个类别一次搜索。
+    """
+
+    name = 'trie'
+
+    join = staticmethod(trie_source)
+
+    def __init__(self, keywords, contexts, terms, window=5):
+        super().__init__(keywords, contexts, terms, window)
+        self.scanner = KeywordMatcher(keywords)
+
+    def contains(self, text, category):
+        return self.scanner.contains(text, category)
+
+    def categories(self, text, spans=None):
+        return self.scanner.scan(text, spans)
+
+
+# 可选的匹配后端：{名称: 类}，各后端对同一文本给出相同的检测结果
+BACKENDS = {backend.name: backend for backend in (RegexBackend, AlternationBackend, TrieBackend)}
+
+# 默认使用最快的后端
+DEFAULT_BACKEND = TrieBackend.name
@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import time
+import platform
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:
+    # Windows 没有 resource 模块，峰值内存改由 Win32 API 读取
+    resource = None
+
+# 统计各类别匹配耗时时最多使用的摘要数（只保留分析过程中最先出现的这些摘要）
+MATCHER_SAMPLE = 2000
+
+
+def peak_rss_mb():
+    """当前进程迄今为止的峰值常驻内存（MB），无法读取时返回None"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以 KB 为单位，macOS 以字节为单位
+        return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+    if os.name == 'nt':
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class Counters(ctypes.Structure):
+                _fields_ = [
+                    ('cb', wintypes.DWORD),
+                    ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t),
+                    ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t),
+                    ('PeakPagefileUsage', ctypes.c_size_t),
+                ]
+
+            counters = Counters()
+            counters.cb = ctypes.sizeof(Counters)
+            ctypes.windll.psapi.GetProcessMemoryInfo(
+                ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+            )
+            return round(counters.PeakWorkingSetSize / (1 << 20), 1)
+        except (AttributeError, OSError):
+            return None
+    return None
+
+
+def children_cpu_seconds():
+    """已结束的子进程（多进程分析）累计使用的CPU时间，无法读取时为0"""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class StageProfiler:
+    """按处理阶段记录耗时、CPU时间、峰值内存和处理速度
+
+    每个阶段记录墙钟时间、本进程CPU时间、子进程CPU时间、阶段结束时的峰值常驻内存，
+    给出记录数时同时计算每秒处理的记录数。结果以JSON保存在结果CSV旁。
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.matchers = None
+        self._started = time.perf_counter()
+
+    def _add(self, name, wall, cpu, children_cpu, records):
+        stage = self.stages.setdefault(name, {
+            "wall_seconds": 0.0, "cpu_seconds": 0.0, "children_cpu_seconds": 0.0, "records": None
+        })
+        stage["wall_seconds"] += wall
+        stage["cpu_seconds"] += cpu
+        stage["children_cpu_seconds"] += children_cpu
+        if records is not None:
+            stage["records"] = (stage["records"] or 0) + records
+        stage["peak_rss_mb"] = peak_rss_mb()
+
+    @contextmanager
+    def stage(self, name, records=None):
+        """记录一个阶段（with 语句块）；records 可在块内通过返回的字典的 "records" 键补充"""
+        info = {"records": records}
+        wall, cpu, children = time.perf_counter(), time.process_time(), children_cpu_seconds()
+        try:
+            yield info
+        finally:
+            self._add(
+                name,
+                time.perf_counter() - wall,
+                time.process_time() - cpu,
+                children_cpu_seconds() - children,
+                info["records"]
+            )
+
+    def timed_iter(self, name, iterable):
+        """包装一个生成器，只累计在其内部（产出下一条记录）花费的时间，记为一个阶段
+
+        读取与分析交替进行时，用它把读取解析的耗时从分析阶段中分离出来。
+        """
+        iterator = iter(iterable)
+        wall = cpu = 0.0
+        count = 0
+        try:
+            while True:
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    wall += time.perf_counter() - wall_start
+                    cpu += time.process_time() - cpu_start
+                count += 1
+                yield item
+        finally:
+            self._add(name, wall, cpu, 0.0, count)
+
+    def exclude(self, outer, inner):
+        """从阶段 outer 中扣除嵌套在其中的阶段 inner 的耗时"""
+        if outer in self.stages and inner in self.stages:
+            for key in ("wall_seconds", "cpu_seconds"):
+                self.stages[outer][key] = max(0.0, self.stages[outer][key] - self.stages[inner][key])
+
+    def profile_matchers(self, lexicon, texts):
+        """分别测量各类别关键词匹配和浓度邻近判断的耗时（用当前匹配后端单独运行各类别）
+
+        分析时所有类别在一次扫描中完成，无法直接拆分各类别的耗时；这里对样本摘要
+        逐类别单独计时，用于比较各词表的相对开销。
+        """
+        backend = lexicon.backend()
+        start = time.perf_counter()
+        for text in texts:
+            lexicon.detect(text)
+        combined = time.perf_counter() - start
+
+        categories = {}
+        for name in lexicon.category_names:
+            start = time.perf_counter()
+            hits = [text for text in texts if backend.contains(text, name)]
+            entry = {"keyword_seconds": time.perf_counter() - start, "keyword_hits": len(hits)}
+            if name in lexicon.concentration_categories:
+                # 与分析时相同，只对命中了该介质关键词的摘要做浓度判断
+                start = time.perf_counter()
+                near = sum(1 for text in hits if backend.near(text, [name]))
+                entry["concentration_seconds"] = time.perf_counter() - start
+                entry["concentration_hits"] = near
+            categories[name] = entry
+
+        self.matchers = {
+            "backend": lexicon.backend_name,
+            "sample_records": len(texts),
+            "detect_seconds": combined,
+            "categories": categories
+        }
+
+    def to_dict(self):
+        stages = {}
+        for name, stage in self.stages.items():
+            stage = dict(stage)
+            if stage["records"] and stage["wall_seconds"] > 0:
+                stage["records_per_second"] = round(stage["records"] / stage["wall_seconds"], 1)
+            stages[name] = stage
+        return {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "total_wall_seconds": time.perf_counter() - self._started,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stages,
+            "matchers": self.matchers
+        }
+
+    def print_summary(self):
+        """在控制台输出各阶段的耗时概况"""
+        print("\n各阶段耗时:")
+        for name, stage in self.to_dict()["stages"].items():
+            line = f"  {name}: {stage['wall_seconds']:.3f}s (CPU {stage['cpu_seconds']:.3f}s"
+            if stage["children_cpu_seconds"]:
+                line += f", 子进程 {stage['children_cpu_seconds']:.3f}s"
+            line += ")"
+            if "records_per_second" in stage:
+                line += f", {stage['records_per_second']:.0f} 篇/秒"
+            if stage.get("peak_rss_mb") is not None:
+                line += f", 峰值内存 {stage['peak_rss_mb']} MB"
+            print(line)
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+def profile_stage(profiler, name, records=None):
+    """profiler 为None时不做任何记录"""
+    if profiler is None:
+        return nullcontext({"records": records})
+    return profiler.stage(name, records)
@@ -0,0 +1,213 @@
+import os
+from contextlib import nullcontext
+from corpus import WRITE_BATCH
+
+# 列式结果文件与结果CSV同名，扩展名为 .parquet
+RESULTS_SUFFIX = '.parquet'
+
+# 列压缩算法（与语料库相同）
+RESULTS_COMPRESSION = 'zstd'
+
+# 结果文件中的文献信息列（各检测项列位于其后，最后是完整摘要）
+INFO_COLUMNS = ('index', 'year', 'title', 'authors', 'doi')
+
+# 命中证据文件的后缀（<结果名>_evidence.parquet）
+EVIDENCE_SUFFIX = '_evidence.parquet'
+
+# 命中证据中关键词前后保留的上下文字符数
+EVIDENCE_CONTEXT = 60
+
+
+def results_path(csv_path):
+    """结果CSV对应的列式结果文件路径"""
+    return os.path.splitext(csv_path)[0] + RESULTS_SUFFIX
+
+
+def evidence_path(csv_path):
+    """结果CSV对应的命中证据文件路径"""
+    return os.path.splitext(csv_path)[0] + EVIDENCE_SUFFIX
+
+
+def results_schema(flag_columns):
+    import pyarrow as pa
+
+    return pa.schema(
+        [('index', pa.int64())]
+        + [(name, pa.string()) for name in INFO_COLUMNS[1:]]
+        + [(name, pa.bool_()) for name in flag_columns]
+        + [('abstract', pa.string())]
+    )
+
+
+def evidence_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('index', pa.int64()),
+        ('flag', pa.dictionary(pa.int8(), pa.string())),
+        ('keyword', pa.dictionary(pa.int32(), pa.string())),
+        ('start', pa.int32()),
+        ('end', pa.int32()),
+        ('snippet', pa.string()),
+    ])
+
+
+class _BatchWriter:
+    """分批写出的 Parquet 文件：先写入临时文件，commit 时再替换为正式文件
+
+    每凑满一批记录写入一个行组，内存中最多保留一批；中途出错或没有结果时不会留下不完整的文件。
+    子类给出 schema 并把记录追加到 self._batch 中。
+    """
+
+    def __init__(self, directory, name, batch_size=WRITE_BATCH):
+        self.batch_size = batch_size
+        self.count = 0
+        self._temp_path = os.path.join(directory, f".{name}.{os.getpid()}.parquet.tmp")
+        self._writer = None
+        self._schema = None
+        self._batch = self._empty_batch()
+
+    def schema(self):
+        raise NotImplementedError
+
+    def _empty_batch(self):
+        return {name: [] for name in self.schema().names}
+
+    def _open(self):
+        if self._writer is None:
+            import pyarrow.parquet as pq
+
+            self._schema = self.schema()
+            self._writer = pq.ParquetWriter(self._temp_path, self._schema, compression=RESULTS_COMPRESSION)
+        return self._writer
+
+    def _flush(self):
+        import pyarrow as pa
+
+        first = next(iter(self._batch.values()))
+        if first:
+            writer = self._open()
+            writer.write_batch(pa.record_batch(self._batch, schema=self._schema))
+            self._batch = self._empty_batch()
+
+    def _row_added(self):
+        self.count += 1
+        if len(next(iter(self._batch.values()))) >= self.batch_size:
+            self._flush()
+
+    def copy_from(self, path, index_offset=0):
+        """复制已有文件中的全部记录（增量模式下新记录接在其后），各记录的编号加上 index_offset"""
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        self._flush()
+        writer = self._open()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=self.batch_size, columns=self._schema.names):
+            if index_offset:
+                column = self._schema.get_field_index('index')
+                batch = batch.set_column(column, 'index', pc.add(batch.column(column), index_offset))
+            writer.write_batch(batch)
+            self.count += batch.num_rows
+
+    def commit(self, path):
+        """写完剩余记录并保存为 path，返回 path"""
+        self._flush()
+        self._open().close()
+        self._writer = None
+        os.replace(self._temp_path, path)
+        return path
+
+    def close(self):
+        """放弃未提交的临时文件"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ResultWriter(_BatchWriter):
+    """边分析边分批写出的列式结果文件（Parquet，按列压缩）
+
+    与结果CSV的内容相同，但保存完整摘要，检测项为布尔列。
+    """
+
+    def __init__(self, directory, flag_columns, batch_size=WRITE_BATCH):
+        self.flag_columns = list(flag_columns)
+        super().__init__(directory, "results", batch_size)
+
+    def schema(self):
+        return results_schema(self.flag_columns)
+
+    def write(self, articles, flags):
+        """追加一批记录：articles 为文献信息字典（含完整摘要），flags 为对应的检测项结果"""
+        for article, row in zip(articles, flags):
+            batch = self._batch
+            batch['index'].append(int(article['index']))
+            for name in INFO_COLUMNS[1:]:
+                batch[name].append(str(article.get(name, '')))
+            for name, flag in zip(self.flag_columns, row):
+                batch[name].append(bool(flag))
+            batch['abstract'].append(article.get('abstract', ''))
+            self._row_added()
+
+
+class EvidenceWriter(_BatchWriter):
+    """边分析边分批写出的命中证据文件（Parquet）
+
+    每个命中的检测项一行：文献编号、检测项（结果CSV中的列名）、命中的关键词、
+    其在完整摘要中的起止位置，以及前后各 context 个字符的上下文片段。
+    检测项和关键词重复很多，按字典编码保存。
+    """
+
+    def __init__(self, directory, flag_columns, context=EVIDENCE_CONTEXT, batch_size=WRITE_BATCH):
+        self.flag_columns = list(flag_columns)
+        self.context = context
+        super().__init__(directory, "evidence", batch_size)
+
+    def schema(self):
+        return evidence_schema()
+
+    def write(self, articles, evidence):
+        """追加一批记录：evidence 为各篇文献的 [(检测项序号, 起点, 终点), ...]"""
+        context = self.context
+        for article, spans in zip(articles, evidence):
+            # 匹配时文本按 fold_text 逐字符转为小写，长度不变，位置即完整摘要中的位置
+            text = article.get('abstract', '')
+            for flag, start, end in spans:
+                batch = self._batch
+                batch['index'].append(int(article['index']))
+                batch['flag'].append(self.flag_columns[flag])
+                batch['keyword'].append(text[start:end])
+                batch['start'].append(start)
+                batch['end'].append(end)
+                batch['snippet'].append(' '.join(text[max(0, start - context):end + context].split()))
+                self._row_added()
+
+
+def open_result_writer(directory, flag_columns, enabled=True, writer=ResultWriter):
+    """enabled 为 False 时返回 None（with 语句中不写出该文件）"""
+    if not enabled:
+        return nullcontext(None)
+    return writer(directory, flag_columns)
+
+
+def read_results(path, columns=None):
+    """读取列式结果文件（可只读取部分列），返回 pyarrow.Table；可用 .to_pandas() 转为 DataFrame"""
+    import pyarrow.parquet as pq
+
+    return pq.ParquetFile(path).read(columns=columns)
+
+
+def read_evidence(path, index=None):
+    """读取命中证据文件，返回 pyarrow.Table；给出 index 时只返回这些编号的文献的证据"""
+    import pyarrow.parquet as pq
+
+    filters = None if index is None else [('index', 'in', list(index))]
+    return pq.read_table(path, filters=filters)
@@ -0,0 +1,202 @@
+import sys
+from array import array
+import numpy as np
+
+# 每条记录保存的文献信息列
+META_COLUMNS = ('index', 'year', 'title', 'authors', 'doi', 'abstract')
+
+# 以 UTF-8 字节串连续存放的文本列（其余列：编号为整数数组，年份为驻留字符串列表）
+TEXT_COLUMNS = ('title', 'authors', 'doi', 'abstract')
+
+
+class TextColumn:
+    """一列文本，所有值以 UTF-8 编码连续存放在一个字节数组中，每个值只额外占用一个偏移量
+
+    与字符串列表相比，不再为每个值保留一个字符串对象（每个约50字节的对象头）和一个列表指针。
+    支持 append、len、下标、切片、迭代和 + 拼接，读取时才解码为字符串。
+    """
+
+    __slots__ = ('_data', '_offsets')
+
+    def __init__(self, values=()):
+        self._data = bytearray()
+        self._offsets = array('Q', [0])
+        for value in values:
+            self.append(value)
+
+    @classmethod
+    def _from_parts(cls, data, offsets):
+        column = cls.__new__(cls)
+        column._data = data
+        column._offsets = offsets
+        return column
+
+    def append(self, value):
+        self._data += str(value).encode('utf-8')
+        self._offsets.append(len(self._data))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return TextColumn(self[j] for j in range(start, stop, step))
+            stop = max(start, stop)
+            base = self._offsets[start]
+            offsets = array('Q', (offset - base for offset in self._offsets[start:stop + 1]))
+            return TextColumn._from_parts(self._data[base:self._offsets[stop]], offsets)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("TextColumn index out of range")
+        return self._data[self._offsets[i]:self._offsets[i + 1]].decode('utf-8')
+
+    def __iter__(self):
+        data = self._data
+        offsets = self._offsets
+        for i in range(len(offsets) - 1):
+            yield data[offsets[i]:offsets[i + 1]].decode('utf-8')
+
+    def __add__(self, other):
+        base = len(self._data)
+        offsets = array('Q', self._offsets)
+        offsets.extend(offset + base for offset in other._offsets[1:])
+        return TextColumn._from_parts(self._data + other._data, offsets)
+
+
+def _empty_column(name):
+    if name == 'index':
+        return array('q')
+    if name in TEXT_COLUMNS:
+        return TextColumn()
+    return []
+
+
+class ResultTable:
+    """列式存储的分析结果
+
+    文献信息按列保存：编号为整数数组，年份为驻留（共享）的字符串列表，标题、作者、
+    DOI和摘要各为一个连续的 UTF-8 字节数组（TextColumn）。各检测项按位压缩保存，
+    每条记录只占 ceil(K/8) 个字节；读取时再展开为 N×K 的布尔矩阵（每行一篇文献，
+    每列一个检测项）。控制台统计、CSV、图表和报告都直接使用这些列，统计数据由布尔矩阵向量化计算。
+    """
+
+    def __init__(self, flag_names):
+        self.flag_names = list(flag_names)
+        self._flag_pos = {name: j for j, name in enumerate(self.flag_names)}
+        self.columns = {name: _empty_column(name) for name in META_COLUMNS}
+        # 每条记录的检测结果按位压缩（第 j 位对应第 j 个检测项，小端字节序）
+        self._width = max(1, (len(self.flag_names) + 7) // 8)
+        self._packed = bytearray()
+
+    def __len__(self):
+        return len(self.columns['index'])
+
+    def append(self, values, flags):
+        """追加一条记录：values 为 {列名: 值}，flags 为按检测项顺序排列的布尔值"""
+        columns = self.columns
+        columns['index'].append(int(values.get('index', 0)))
+        # 年份的取值很少，驻留后所有记录共用同一批字符串对象
+        columns['year'].append(sys.intern(str(values.get('year', ''))))
+        for name in TEXT_COLUMNS:
+            columns[name].append(values.get(name, ''))
+        code = 0
+        for bit, flag in enumerate(flags):
+            if flag:
+                code |= 1 << bit
+        self._packed += code.to_bytes(self._width, 'little')
+
+    def _packed_rows(self):
+        """N×ceil(K/8) 的压缩检测结果（uint8）"""
+        return np.frombuffer(bytes(self._packed), dtype=np.uint8).reshape(-1, self._width)
+
+    @property
+    def flags(self):
+        """N×K 的检测结果布尔矩阵（由压缩的检测结果展开）"""
+        bits = np.unpackbits(self._packed_rows(), axis=1, bitorder='little')
+        return bits[:, :len(self.flag_names)].astype(bool)
+
+    def flag(self, name):
+        """某个检测项的布尔列"""
+        return self.flags[:, self._flag_pos[name]]
+
+    def records(self):
+        """逐条产出 {列名/检测项: 值} 字典"""
+        names = list(META_COLUMNS)
+        for values, flags in zip(zip(*(self.columns[n] for n in names)), self.flags.tolist()):
+            record = dict(zip(names, values))
+            record.update(zip(self.flag_names, flags))
+            yield record
+
+    def slice(self, start, stop):
+        """返回第 start 到 stop-1 条记录组成的新结果表"""
+        table = ResultTable(self.flag_names)
+        for name in META_COLUMNS:
+            table.columns[name] = self.columns[name][start:stop]
+        table._packed = self._packed[start * self._width:stop * self._width]
+        return table
+
+    def concat(self, other):
+        """返回两组结果按顺序拼接后的新结果表"""
+        table = ResultTable(self.flag_names)
+        for name in META_COLUMNS:
+            table.columns[name] = self.columns[name] + other.columns[name]
+        table._packed = self._packed + other._packed
+        return table
+
+    def cooccurrence(self):
+        """检测项共现矩阵（K×K），第 i 行第 j 列为同时满足检测项 i 和 j 的文献数，对角线即各检测项的文献数
+
+        由布尔矩阵与自身转置相乘一次得到，不逐对循环。
+        """
+        flags = self.flags.astype(np.int64)
+        return flags.T @ flags
+
+    def combination_codes(self):
+        """每篇文献的检测项组合编码（第 j 位对应第 j 个检测项），即压缩保存的检测结果"""
+        weights = np.left_shift(np.int64(1), np.arange(0, 8 * self._width, 8, dtype=np.int64))
+        return self._packed_rows().astype(np.int64) @ weights
+
+    def combination_counts(self):
+        """各检测项组合（恰好命中这些检测项）的文献数，返回 {组合编码: 文献数}"""
+        codes, counts = np.unique(self.combination_codes(), return_counts=True)
+        return dict(zip(codes.tolist(), counts.tolist()))
+
+    def year_counts(self):
+        """各出版年份的文献数及各检测项的文献数，返回 {年份: [文献数, 检测项1的文献数, ...]}（按年份排序）"""
+        if not len(self):
+            return {}
+        years, inverse = np.unique(np.array(self.columns['year'], dtype=str), return_inverse=True)
+        sums = np.zeros((len(years), len(self.flag_names) + 1), dtype=np.int64)
+        np.add.at(sums, inverse, np.column_stack([np.ones(len(self), dtype=np.int64), self.flags]))
+        return {year: row for year, row in zip(years.tolist(), sums.tolist())}
+
+    def combination_label(self, code):
+        """组合编码对应的检测项名称，以 "+" 连接"""
+        return "+".join(name for j, name in enumerate(self.flag_names) if code >> j & 1)
+
+    def statistics(self, combinations):
+        """统计各检测项、共现矩阵以及所有检测项组合的文献数
+
+        combinations: {统计名: 需同时满足的检测项}，由组合分布直接求和得到
+        """
+        exact = self.combination_counts()
+        codes = np.array(list(exact), dtype=np.int64)
+        code_counts = np.array(list(exact.values()), dtype=np.int64)
+        matrix = self.cooccurrence()
+
+        counts = dict(zip(self.flag_names, np.diag(matrix).tolist()))
+        for label, names in combinations.items():
+            mask = 0
+            for name in names:
+                mask |= 1 << self._flag_pos[name]
+            counts[label] = int(code_counts[(codes & mask) == mask].sum())
+        return {
+            "total": len(self),
+            "counts": counts,
+            "flag_names": list(self.flag_names),
+            "cooccurrence": matrix.tolist(),
+            "combinations": {self.combination_label(code): count for code, count in exact.items()}
+        }
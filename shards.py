@@ -0,0 +1,469 @@
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import socket
+import argparse
+import traceback
+from datetime import datetime
+from matcher import BACKENDS
+
+# 工作队列目录中的任务状态子目录：任务文件在其间以 os.rename 原子移动，
+# 多个进程（或共享该目录的多台机器）同时领取任务时，每个任务只会被一个进程领到
+QUEUE_STATES = ('pending', 'running', 'done', 'failed')
+
+# 各分片的输出位于队列目录的 shards/<任务名>/ 中
+SHARDS_DIRNAME = 'shards'
+
+# 分片输出：结果CSV（编号从1开始）和可合并的汇总文件
+SHARD_CSV = 'results.csv'
+AGGREGATE_FILENAME = 'aggregate.json'
+
+# 汇总文件格式修改时递增，合并时拒绝旧格式的分片
+AGGREGATE_REVISION = 1
+
+# 领取超过该时长（秒）仍未完成的任务视为中断，requeue 时可放回 pending；
+# 无法判断领取进程是否仍在运行时（其他机器上的进程）只按该时长判断
+STALE_TASK_SECONDS = 6 * 3600
+
+
+def queue_path(queue_dir, state, name=''):
+    return os.path.join(queue_dir, state, name)
+
+
+def shard_dir(queue_dir, name):
+    return os.path.join(queue_dir, SHARDS_DIRNAME, name)
+
+
+def read_task(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_task(path, task):
+    """先写临时文件再替换，其他进程不会读到写了一半的任务文件"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(task, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def task_names(queue_dir, state):
+    """某个状态下的任务名（按编号排序）"""
+    directory = queue_path(queue_dir, state)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-5] for name in os.listdir(directory) if name.endswith('.json'))
+
+
+def queue_status(queue_dir):
+    """返回 {状态: [任务名, ...]}"""
+    return {state: task_names(queue_dir, state) for state in QUEUE_STATES}
+
+
+def init_queue(queue_dir, inputs, files_per_task=1):
+    """为输入文件创建任务（每 files_per_task 个文件一个任务），返回新建的任务名
+
+    任务名以编号开头，合并时按编号顺序拼接各分片，记录编号与批量模式按相同顺序处理这些文件时一致；
+    队列中已有任务时，新任务接着编号。
+    """
+    for state in QUEUE_STATES:
+        os.makedirs(queue_path(queue_dir, state), exist_ok=True)
+    os.makedirs(os.path.join(queue_dir, SHARDS_DIRNAME), exist_ok=True)
+    number = sum(len(names) for names in queue_status(queue_dir).values())
+    names = []
+    for start in range(0, len(inputs), files_per_task):
+        paths = [os.path.abspath(path) for path in inputs[start:start + files_per_task]]
+        number += 1
+        name = f"{number:05d}_{os.path.splitext(os.path.basename(paths[0]))[0]}"
+        write_task(queue_path(queue_dir, 'pending', name + '.json'), {"task": name, "inputs": paths})
+        names.append(name)
+    return names
+
+
+def claim_task(queue_dir, worker):
+    """领取一个待处理的任务（移入 running），没有任务时返回None
+
+    os.rename 是原子操作：多个进程同时领取同一个任务时只有一个成功，其余进程继续尝试下一个。
+    """
+    for name in task_names(queue_dir, 'pending'):
+        path = queue_path(queue_dir, 'running', name + '.json')
+        try:
+            os.rename(queue_path(queue_dir, 'pending', name + '.json'), path)
+        except FileNotFoundError:
+            continue
+        task = read_task(path)
+        task.update(worker=worker, claimed=datetime.now().isoformat(timespec='seconds'))
+        write_task(path, task)
+        return task
+    return None
+
+
+def finish_task(queue_dir, task, state):
+    """将任务从 running 移入 done 或 failed，返回是否成功
+
+    任务已被强制放回队列（running 中没有该任务，或已由其他进程重新领取）时不再登记，返回False。
+    """
+    path = queue_path(queue_dir, 'running', task["task"] + '.json')
+    try:
+        current = read_task(path)
+    except FileNotFoundError:
+        return False
+    if current.get('worker') != task.get('worker') or current.get('claimed') != task.get('claimed'):
+        return False
+    write_task(path, task)
+    os.replace(path, queue_path(queue_dir, state, task["task"] + '.json'))
+    return True
+
+
+def worker_alive(worker):
+    """领取任务的进程（"主机名:进程号"）是否仍在运行；不在本机或无法判断时返回None"""
+    host, _, pid = (worker or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit() or os.name == 'nt':
+        # Windows 上 os.kill(pid, 0) 会向进程发送 Ctrl+C，不能用来探测
+        return None
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # 进程存在，但属于其他用户
+        return True
+    return True
+
+
+def task_age(task):
+    """任务被领取以来的秒数，没有领取时间时返回None"""
+    try:
+        claimed = datetime.fromisoformat(task['claimed'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (datetime.now() - claimed).total_seconds()
+
+
+def is_stale(task, timeout=STALE_TASK_SECONDS):
+    """running 中的任务是否已中断：领取进程已退出，或无法判断进程状态且领取已超过 timeout 秒"""
+    alive = worker_alive(task.get('worker'))
+    if alive is not None:
+        return not alive
+    age = task_age(task)
+    return age is None or age > timeout
+
+
+def requeue(queue_dir, timeout=STALE_TASK_SECONDS, force=False):
+    """将失败（failed）和中断（running 中已中断）的任务放回 pending，返回 (放回的任务名, 仍在运行而保留的任务名)
+
+    领取进程仍在运行的任务不放回，以免同一任务被处理两次；force 为 True 时 running 中的任务全部放回
+    （原进程完成后不会再登记该任务，见 finish_task）。
+    """
+    names = []
+    kept = []
+    for state in ('running', 'failed'):
+        for name in task_names(queue_dir, state):
+            path = queue_path(queue_dir, state, name + '.json')
+            if state == 'running' and not force:
+                try:
+                    task = read_task(path)
+                except FileNotFoundError:
+                    continue
+                if not is_stale(task, timeout):
+                    kept.append(name)
+                    continue
+            try:
+                os.replace(path, queue_path(queue_dir, 'pending', name + '.json'))
+            except FileNotFoundError:
+                # 任务刚好完成，已移入 done 或 failed
+                continue
+            names.append(name)
+    return sorted(names), kept
+
+
+def shard_aggregate(task, results, files):
+    """分片的可合并汇总：统计总数（各检测项、组合分布、共现矩阵）和各年份的文献数，均可逐项相加；
+    files 为各输入文件的记录数 [[文件, 记录数], ...]"""
+    import NERRE
+
+    return {
+        "revision": AGGREGATE_REVISION,
+        "task": task["task"],
+        "files": files,
+        "records": len(results),
+        "totals": NERRE.compute_totals(results),
+        "years": results.year_counts(),
+    }
+
+
+def run_task(queue_dir, task, workers=1, cache_path=None, parquet=False, evidence=False):
+    """分析一个任务的输入文件，将结果CSV和汇总写入分片目录，返回记录数
+
+    分片先写入临时目录，完成后再改名为正式目录，中途出错不会留下不完整的分片。
+    """
+    import NERRE
+    from result_store import open_result_writer, EvidenceWriter, RESULTS_SUFFIX, EVIDENCE_SUFFIX
+
+    name = task["task"]
+    final_dir = shard_dir(queue_dir, name)
+    temp_dir = os.path.join(queue_dir, SHARDS_DIRNAME, f".{name}.{os.getpid()}.tmp")
+    os.makedirs(temp_dir, exist_ok=True)
+    files = []
+
+    def task_articles():
+        # 逐个文件读取，记录连续编号，并记下各文件的记录数（合并时按文件拆分结果）
+        count = 0
+        for path in task["inputs"]:
+            start = count
+            for article in NERRE.extract_articles(path):
+                count += 1
+                article['index'] = count
+                yield article
+            files.append([path, count - start])
+
+    try:
+        with open_result_writer(temp_dir, NERRE.FLAG_COLUMNS, parquet) as writer, \
+                open_result_writer(temp_dir, NERRE.FLAG_COLUMNS, evidence, EvidenceWriter) as evidence_writer:
+            results = NERRE.run_analysis(task_articles(), workers, cache_path, None, writer, evidence_writer)
+            if writer is not None:
+                writer.commit(os.path.join(temp_dir, 'results' + RESULTS_SUFFIX))
+            if evidence_writer is not None:
+                evidence_writer.commit(os.path.join(temp_dir, 'results' + EVIDENCE_SUFFIX))
+        NERRE.write_results_csv(os.path.join(temp_dir, SHARD_CSV), results)
+        with open(os.path.join(temp_dir, AGGREGATE_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(shard_aggregate(task, results, files), f, ensure_ascii=False)
+        if os.path.isdir(final_dir):
+            # 重新处理的任务覆盖之前的分片
+            shutil.rmtree(final_dir)
+        os.rename(temp_dir, final_dir)
+    finally:
+        if os.path.isdir(temp_dir):
+            shutil.rmtree(temp_dir)
+    return len(results)
+
+
+def work(queue_dir, workers=1, cache_path=None, parquet=False, evidence=False, max_tasks=None):
+    """不断领取并处理任务，直到没有待处理的任务（或处理了 max_tasks 个），返回处理的任务数
+
+    出错的任务记下错误信息后移入 failed，继续处理其他任务。
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    count = 0
+    while max_tasks is None or count < max_tasks:
+        task = claim_task(queue_dir, worker)
+        if task is None:
+            break
+        count += 1
+        print(f"处理任务 {task['task']}（{len(task['inputs'])} 个文件）")
+        start = time.perf_counter()
+        try:
+            records = run_task(queue_dir, task, workers, cache_path, parquet, evidence)
+        except Exception:
+            task["error"] = traceback.format_exc()
+            if finish_task(queue_dir, task, 'failed'):
+                print(f"错误: 任务 {task['task']} 处理失败\n{task['error']}")
+            else:
+                print(f"警告: 任务 {task['task']} 已被放回队列，不再登记本次的失败")
+            continue
+        task.update(records=records, seconds=round(time.perf_counter() - start, 3))
+        if finish_task(queue_dir, task, 'done'):
+            print(f"任务 {task['task']} 完成: {records} 篇文献，用时 {task['seconds']} 秒")
+        else:
+            print(f"警告: 任务 {task['task']} 已被放回队列，不再登记本次的结果")
+    return count
+
+
+def load_aggregate(queue_dir, name):
+    with open(os.path.join(shard_dir(queue_dir, name), AGGREGATE_FILENAME), 'r', encoding='utf-8') as f:
+        aggregate = json.load(f)
+    if aggregate.get("revision") != AGGREGATE_REVISION:
+        raise ValueError(f"分片 {name} 的汇总文件格式已过期，请重新处理该任务")
+    return aggregate
+
+
+def add_year_counts(years, delta):
+    """累加各年份的文献数（{年份: [文献数, 各检测项的文献数...]}）"""
+    years = dict(years)
+    for year, row in delta.items():
+        years[year] = [a + b for a, b in zip(years[year], row)] if year in years else list(row)
+    return years
+
+
+def save_year_counts(csv_path, years, flag_names):
+    """将各年份的文献数保存为CSV（<结果名>_years.csv），按年份排序"""
+    path = os.path.splitext(csv_path)[0] + "_years.csv"
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Year', 'Total'] + list(flag_names))
+        for year in sorted(years):
+            writer.writerow([year] + years[year])
+    return path
+
+
+def merge_columnar(queue_dir, offsets, output_dir, suffix, path, writer):
+    """按顺序拼接各分片的列式文件（结果或命中证据），各记录的编号加上分片的起始编号；
+    有分片缺少该文件时不合并，返回None"""
+    import NERRE
+    from result_store import open_result_writer
+
+    sources = [os.path.join(shard_dir(queue_dir, name), 'results' + suffix) for name, _ in offsets]
+    missing = [source for source in sources if not os.path.isfile(source)]
+    if missing:
+        print(f"警告: {len(missing)} 个分片没有 {suffix} 文件，不合并该文件")
+        return None
+    with open_result_writer(output_dir, NERRE.FLAG_COLUMNS, writer=writer) as merged:
+        for source, (_, start) in zip(sources, offsets):
+            merged.copy_from(source, start)
+        return merged.commit(path)
+
+
+def merge_shards(queue_dir, output_dir, plots=True, parquet=False, evidence=False):
+    """合并所有分片：按任务编号顺序拼接结果CSV（接着编号），逐项相加各分片的汇总
+
+    不再读取任何导出文件：统计、共现矩阵和年份分布由汇总文件相加得到，
+    图表所需的检测结果取自分片的结果CSV。输出与批量模式相同（合并CSV、统计、各文件对照表、图表），
+    另存各年份的文献数。parquet / evidence 为 True 时拼接各分片的列式结果文件和命中证据文件。
+    """
+    import NERRE
+    from result_table import ResultTable
+    from result_store import ResultWriter, EvidenceWriter, RESULTS_SUFFIX, EVIDENCE_SUFFIX, results_path, evidence_path
+
+    status = queue_status(queue_dir)
+    unfinished = status['pending'] + status['running'] + status['failed']
+    if unfinished:
+        raise ValueError(f"还有 {len(unfinished)} 个任务没有完成: {', '.join(unfinished)}")
+    names = status['done']
+    if not names:
+        raise ValueError(f"队列 {queue_dir} 中没有已完成的任务")
+
+    print(f"开始合并 {len(names)} 个分片")
+    os.makedirs(output_dir, exist_ok=True)
+    results = ResultTable(NERRE.FLAG_NAMES)
+    totals = None
+    years = {}
+    # 各输入文件在合并结果中的行范围 (文件, 起始行, 结束行)，以及各分片的起始编号
+    spans = []
+    offsets = []
+    for name in names:
+        aggregate = load_aggregate(queue_dir, name)
+        if aggregate["totals"].get("lexicon_version") != NERRE.LEXICON_VERSION:
+            print(f"警告: 分片 {name} 使用的关键词列表与当前不同，建议重新处理该任务")
+        start = len(results)
+        NERRE.load_results_csv(os.path.join(shard_dir(queue_dir, name), SHARD_CSV), results, start)
+        if len(results) - start != aggregate["records"]:
+            raise ValueError(f"分片 {name} 的结果CSV与汇总文件的记录数不一致")
+        totals = aggregate["totals"] if totals is None else NERRE.add_totals(totals, aggregate["totals"])
+        years = add_year_counts(years, aggregate["years"])
+        offsets.append((name, start))
+        for path, records in aggregate["files"]:
+            spans.append((path, start, start + records))
+            start += records
+        print(f"  {name}: {aggregate['records']} 篇")
+    print(f"合并 {len(results)} 篇文献")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_csv = os.path.join(output_dir, f"literature_analysis_{timestamp}.csv")
+    if parquet:
+        path = merge_columnar(queue_dir, offsets, output_dir, RESULTS_SUFFIX, results_path(output_csv), ResultWriter)
+        if path:
+            print(f"列式结果（含完整摘要）已保存到: {path}")
+    if evidence:
+        path = merge_columnar(queue_dir, offsets, output_dir, EVIDENCE_SUFFIX, evidence_path(output_csv), EvidenceWriter)
+        if path:
+            print(f"命中证据已保存到: {path}")
+
+    plot_job = NERRE.start_plots(results, totals, output_dir, plots=plots)
+    NERRE.write_results_csv(output_csv, results)
+    NERRE.save_totals(output_csv, totals)
+    print(f"\n合并结果已保存到: {output_csv}")
+    years_path = save_year_counts(output_csv, years, NERRE.FLAG_NAMES)
+    print(f"各年份文献数已保存到: {years_path}")
+    breakdown_dir, summary_path, rows = NERRE.write_file_breakdown(output_csv, spans, results)
+    print(f"各文件结果已保存到: {breakdown_dir}")
+    print(f"各文件统计对照表已保存到: {summary_path}")
+
+    outputs = NERRE.finish_outputs(output_csv, results, totals, output_dir, plot_job=plot_job)
+    outputs["file_totals"] = rows
+    outputs["years"] = years
+    return outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="分片处理大量WOS导出文件：以目录作为工作队列，各分片独立分析，最后合并")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init_parser = subparsers.add_parser("init", help="为导出文件创建任务（已有队列时追加任务）")
+    init_parser.add_argument("queue", help="工作队列目录")
+    init_parser.add_argument("inputs", nargs="+", metavar="html_file",
+                             help="WOS导出HTML文件、语料库文件、包含导出文件的目录或通配符")
+    init_parser.add_argument("--files-per-task", type=int, default=1, help="每个任务包含的文件数（默认1）")
+
+    work_parser = subparsers.add_parser("work", help="领取并处理任务，直到队列中没有待处理的任务")
+    work_parser.add_argument("queue", help="工作队列目录")
+    work_parser.add_argument("--workers", type=int, default=1, help="每个任务并行分析的进程数（默认1）")
+    work_parser.add_argument("--cache", help="分析缓存文件路径（默认不使用缓存；多台机器应各自使用本地的缓存文件）")
+    work_parser.add_argument("--backend", choices=list(BACKENDS), help="关键词匹配后端（各后端的检测结果相同）")
+    work_parser.add_argument("--max-tasks", type=int, help="最多处理的任务数")
+    work_parser.add_argument("--parquet", action="store_true", help="各分片另存列式结果文件（需安装 pyarrow）")
+    work_parser.add_argument("--evidence", action="store_true", help="各分片另存命中证据文件（需安装 pyarrow）")
+
+    status_parser = subparsers.add_parser("status", help="显示各状态的任务")
+    status_parser.add_argument("queue", help="工作队列目录")
+
+    requeue_parser = subparsers.add_parser("requeue", help="将中断或失败的任务放回待处理队列")
+    requeue_parser.add_argument("queue", help="工作队列目录")
+    requeue_parser.add_argument("--timeout", type=float, default=STALE_TASK_SECONDS / 3600,
+                                help=f"无法判断领取进程是否仍在运行时（其他机器），领取超过该时长（小时）的任务视为中断"
+                                     f"（默认{STALE_TASK_SECONDS / 3600:g}）")
+    requeue_parser.add_argument("--force", action="store_true",
+                                help="放回 running 中的全部任务，包括领取进程仍在运行的任务")
+
+    merge_parser = subparsers.add_parser("merge", help="合并所有分片，生成最终的CSV、统计和图表（不读取导出文件）")
+    merge_parser.add_argument("queue", help="工作队列目录")
+    merge_parser.add_argument("-o", "--output-dir", default="./results", help="结果保存目录（默认 ./results）")
+    merge_parser.add_argument("--no-plots", action="store_true", help="只输出CSV和统计数据，不生成图表和HTML报告")
+    merge_parser.add_argument("--parquet", action="store_true", help="合并各分片的列式结果文件")
+    merge_parser.add_argument("--evidence", action="store_true", help="合并各分片的命中证据文件")
+    args = parser.parse_args()
+
+    if args.command == "init":
+        from wos_reader import expand_inputs
+        inputs = expand_inputs(args.inputs)
+        missing = [path for path in inputs if not os.path.isfile(path)]
+        for path in missing:
+            print(f"错误: 文件 '{path}' 不存在")
+        if missing:
+            sys.exit(1)
+        names = init_queue(args.queue, inputs, max(1, args.files_per_task))
+        print(f"已在 {args.queue} 中创建 {len(names)} 个任务")
+    elif args.command == "work":
+        if args.backend:
+            import NERRE
+            NERRE.select_backend(args.backend)
+        count = work(args.queue, max(1, args.workers), args.cache, args.parquet, args.evidence, args.max_tasks)
+        print(f"共处理 {count} 个任务")
+    elif args.command == "status":
+        for state, names in queue_status(args.queue).items():
+            print(f"{state}: {len(names)}")
+            if state in ('running', 'failed'):
+                for name in names:
+                    task = read_task(queue_path(args.queue, state, name + '.json'))
+                    stale = "，已中断" if state == 'running' and is_stale(task) else ""
+                    print(f"  {name}（{task.get('worker', '')}，{task.get('claimed', '')}{stale}）")
+    elif args.command == "requeue":
+        names, kept = requeue(args.queue, args.timeout * 3600, args.force)
+        print(f"已放回 {len(names)} 个任务")
+        if kept:
+            print(f"以下 {len(kept)} 个任务的领取进程仍在运行（或领取未超过 {args.timeout:g} 小时），未放回；"
+                  f"确认进程已停止时可加 --force：")
+            for name in kept:
+                print(f"  {name}")
+    else:
+        try:
+            outputs = merge_shards(args.queue, args.output_dir, plots=not args.no_plots,
+                                   parquet=args.parquet, evidence=args.evidence)
+        except ValueError as e:
+            print(f"错误: {e}")
+            sys.exit(1)
+        if not args.no_plots:
+            import NERRE
+            NERRE.generate_html_report(args.output_dir, outputs)
@@ -0,0 +1,361 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import argparse
+import numpy as np
+from corpus import iter_inputs
+from wos_reader import expand_inputs
+from matcher import fold_case, fold_text, split_atoms
+from lexicon import DEFAULT_LEXICON_PATH, flatten_keywords
+
+# 词项索引文件扩展名（numpy 压缩归档）
+INDEX_SUFFIX = '.terms.npz'
+
+# 索引格式或分词方式修改时递增，旧索引需要重新构建
+INDEX_REVISION = 2
+
+# 关键词匹配结果缓存文件的后缀（<索引名>.matches.json）
+MATCHES_SUFFIX = '.matches.json'
+
+# 词项包含的最大单词数（1~3个单词的 n-gram；更长的多词关键词无法在索引中匹配）
+DEFAULT_NGRAM = 3
+
+# 分词时从单词两端去除的标点（单词内部的连字符、逗号、斜杠等保留，如 p-phenylenediamine、1,4-、μg/l）
+TOKEN_PUNCTUATION = '.,;:!?()[]{}"\'“”‘’<>'
+
+# 词表中各词项之间的分隔符（关键词模式不会匹配该字符，匹配不会跨越两个词项）
+TERM_SEPARATOR = '\x00'
+
+# 模式中含有空白时才可能匹配多个单词
+MULTIWORD = re.compile(r' |\\s')
+
+# 关键词模式中必须出现的字面字符串不短于该长度时，先用它在词表中筛选候选词项
+MIN_LITERAL = 3
+
+
+def tokenize(text):
+    """将摘要按 fold_text 转为小写（与逐篇检测相同）并按空白分词，去除单词两端的标点"""
+    tokens = (token.strip(TOKEN_PUNCTUATION) for token in fold_text(text).split())
+    return [token for token in tokens if token]
+
+
+def required_literal(pattern):
+    """关键词模式（已转为小写）每次匹配都必然包含的最长字面字符串，无法确定或过短时返回None"""
+    atoms = split_atoms(pattern)
+    if atoms is None:
+        return None
+    best = run = ''
+    for atom in atoms:
+        if len(atom) == 1 and atom not in '.^$':
+            run += atom
+        elif len(atom) == 2 and atom[0] == '\\' and not atom[1].isalnum():
+            run += atom[1]
+        else:
+            run = ''
+        best = max(best, run, key=len)
+    return best if len(best) >= MIN_LITERAL else None
+
+
+def spans_term(term, match):
+    """在词项中的一次匹配是否从第一个单词开始、到最后一个单词结束"""
+    return ' ' not in term[:match.start()] and ' ' not in term[match.end():]
+
+
+def iter_terms(tokens, ngram=DEFAULT_NGRAM):
+    """产出 1~ngram 个相邻单词组成的词项（以单个空格连接）"""
+    for n in range(1, ngram + 1):
+        for i in range(len(tokens) - n + 1):
+            yield ' '.join(tokens[i:i + n])
+
+
+class TermIndex:
+    """词项-文献计数矩阵（CSR 稀疏矩阵）
+
+    每行一篇文献，每列一个词项（1~3个单词的 n-gram），值为该词项在摘要中出现的次数。
+    一组关键词（正则模式，与 lexicons.json 中的写法相同）先在词表中匹配，得到
+    词项权重向量 v，各文献的得分即稀疏矩阵与向量的乘积 X·v，不需要重新读取或扫描摘要；
+    得分大于0即为命中。修改关键词或新增类别后可在毫秒级内重新计算全部文献。
+
+    单个单词的词项中出现关键词即计数；多个单词的词项只在关键词的一次匹配从第一个单词
+    开始、到最后一个单词结束时计数（如 "surface water"），同一处出现不会被重复计数。
+
+    在词表中匹配一个多词关键词需要搜索全部多词词项（数十毫秒），各关键词匹配到的列号
+    保存在索引旁的 .matches.json 中；再次计算时只需匹配新增或修改过的关键词。
+    """
+
+    def __init__(self, matrix, blob, lengths, groups, index, ngram=DEFAULT_NGRAM, build_id=None):
+        # matrix: scipy.sparse.csr_matrix（文献数 × 词项数），各列按词项的单词数排列；
+        # blob: 以分隔符连接的全部词项；lengths: 各词项的字符数；
+        # groups: 各单词数的词项所在的列范围 {单词数: (起始列, 结束列)}；index: 各行对应的文献编号
+        self.matrix = matrix
+        self.index = np.asarray(index, dtype=np.int64)
+        self.ngram = ngram
+        self._blob = blob
+        self._lengths = np.asarray(lengths, dtype=np.int64)
+        self._starts = np.concatenate(([0], np.cumsum(self._lengths + 1)[:-1])).astype(np.int64)
+        self._groups = groups
+        # 每次构建的唯一标识，关键词匹配结果缓存只对同一次构建的索引有效
+        self.build_id = build_id or uuid.uuid4().hex
+        self._matches = {}
+        self._matches_changed = False
+
+    @classmethod
+    def build(cls, articles, ngram=DEFAULT_NGRAM):
+        """由文献流构建索引（只读取摘要和编号）"""
+        from scipy.sparse import csr_matrix
+
+        vocabulary = {}
+        index = []
+        indptr = [0]
+        indices = []
+        data = []
+        for article in articles:
+            counts = {}
+            for term in iter_terms(tokenize(article.get('abstract', '')), ngram):
+                column = vocabulary.setdefault(term, len(vocabulary))
+                counts[column] = counts.get(column, 0) + 1
+            indices.extend(counts)
+            data.extend(counts.values())
+            indptr.append(len(indices))
+            index.append(article['index'])
+        # 按单词数重新排列各列，同一单词数的词项在词表中连续存放，可整段匹配
+        terms = list(vocabulary)
+        words = np.array([term.count(' ') + 1 for term in terms], dtype=np.int64)
+        order = np.argsort(words, kind='stable')
+        position = np.empty_like(order)
+        position[order] = np.arange(len(order))
+        terms = [terms[column] for column in order]
+        words = words[order]
+        groups = {}
+        for n in range(1, ngram + 1):
+            start, stop = np.searchsorted(words, [n, n + 1])
+            if stop > start:
+                groups[n] = (int(start), int(stop))
+        matrix = csr_matrix(
+            (np.array(data, dtype=np.int32), position[np.array(indices, dtype=np.int64)].astype(np.int32),
+             np.array(indptr, dtype=np.int64)),
+            shape=(len(index), len(terms))
+        )
+        matrix.sort_indices()
+        lengths = np.array([len(term) for term in terms], dtype=np.int64)
+        return cls(matrix, TERM_SEPARATOR.join(terms), lengths, groups, index, ngram)
+
+    def save(self, path):
+        """保存为 numpy 压缩归档（词表以分隔符连接为一个字符串保存）"""
+        matrix = self.matrix
+        temp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            temp_path,
+            revision=INDEX_REVISION,
+            ngram=self.ngram,
+            shape=np.array(matrix.shape, dtype=np.int64),
+            data=matrix.data.astype(np.int32),
+            indices=matrix.indices.astype(np.int32),
+            indptr=matrix.indptr.astype(np.int64),
+            index=self.index,
+            build_id=np.array(self.build_id),
+            terms=np.frombuffer(self._blob.encode('utf-8'), dtype=np.uint8),
+            lengths=self._lengths.astype(np.uint32),
+            groups=np.array([(n, start, stop) for n, (start, stop) in self._groups.items()], dtype=np.int64)
+        )
+        os.replace(temp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        from scipy.sparse import csr_matrix
+
+        with np.load(path) as archive:
+            if int(archive['revision']) != INDEX_REVISION:
+                raise ValueError(f"词项索引 {path} 由旧版本程序生成，请重新构建")
+            matrix = csr_matrix((archive['data'], archive['indices'], archive['indptr']),
+                                shape=tuple(archive['shape']))
+            groups = {int(n): (int(start), int(stop)) for n, start, stop in archive['groups']}
+            return cls(matrix, archive['terms'].tobytes().decode('utf-8'), archive['lengths'], groups,
+                       archive['index'], int(archive['ngram']), str(archive['build_id']))
+
+    def load_matches(self, path):
+        """读取关键词匹配结果缓存（来自其他索引或已损坏时忽略）"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cache.get("build_id") == self.build_id:
+            self._matches.update(
+                (pattern, np.array(columns, dtype=np.int64)) for pattern, columns in cache["patterns"].items()
+            )
+
+    def save_matches(self, path):
+        """保存关键词匹配结果缓存（有新匹配的关键词时才写入）"""
+        if not self._matches_changed:
+            return
+        cache = {
+            "build_id": self.build_id,
+            "patterns": {pattern: columns.tolist() for pattern, columns in self._matches.items()}
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        self._matches_changed = False
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @property
+    def term_count(self):
+        return self.matrix.shape[1]
+
+    def term(self, column):
+        """第 column 列的词项"""
+        start = self._starts[column]
+        return self._blob[start:start + self._lengths[column]]
+
+    def match_terms(self, pattern):
+        """返回词表中与一个关键词模式匹配的列号数组
+
+        模式中有足够长的必然出现的字面字符串时，先在词表中查找该字符串得到候选词项，
+        只对候选词项运行正则；否则对词表中的所有词项运行正则。
+        """
+        cached = self._matches.get(pattern)
+        if cached is not None:
+            return cached
+        key = pattern
+        pattern = fold_case(pattern)
+        compiled = re.compile(pattern)
+        literal = required_literal(pattern)
+        finder = compiled if literal is None else re.compile(re.escape(literal))
+        multiword = bool(MULTIWORD.search(pattern))
+        starts = self._starts
+        hits = []
+        for n, (first, last) in self._groups.items():
+            if n > 1 and not multiword:
+                continue
+            # 只在该单词数的词项所在的一段词表中查找
+            begin = int(starts[first])
+            end = int(starts[last - 1] + self._lengths[last - 1])
+            candidates = np.unique(np.searchsorted(
+                starts, [m.start() for m in finder.finditer(self._blob, begin, end)], side='right'
+            ) - 1)
+            # 多个单词的词项：匹配须从第一个单词开始、到最后一个单词结束
+            hits.extend(
+                column for column in candidates.tolist()
+                if any(n == 1 or spans_term(self.term(column), m) for m in compiled.finditer(self.term(column)))
+            )
+        columns = np.unique(np.array(hits, dtype=np.int64))
+        self._matches[key] = columns
+        self._matches_changed = True
+        return columns
+
+    def term_vector(self, keywords):
+        """关键词权重向量：keywords 为模式列表（权重均为1）或 {模式: 权重}"""
+        if not isinstance(keywords, dict):
+            keywords = dict.fromkeys(keywords, 1.0)
+        vector = np.zeros(self.matrix.shape[1], dtype=np.float64)
+        for pattern, weight in keywords.items():
+            vector[self.match_terms(pattern)] += weight
+        return vector
+
+    def score(self, keywords):
+        """各文献的得分（稀疏矩阵乘以关键词权重向量），与 self.index 一一对应"""
+        return self.matrix @ self.term_vector(keywords)
+
+    def flags(self, keywords):
+        """各文献是否出现了这组关键词"""
+        return self.score(keywords) > 0
+
+    def score_lexicon(self, config):
+        """按词表文件的内容计算各类别的得分，返回 {类别名: 得分数组}
+
+        关键词可写成 {模式: 权重} 表示加权得分；浓度判断需要单词间距，不在索引中计算。
+        """
+        scores = {}
+        for category in config['categories']:
+            keywords = category['keywords']
+            if not (isinstance(keywords, dict) and all(isinstance(v, (int, float)) for v in keywords.values())):
+                keywords = flatten_keywords(keywords)
+            scores[category['name']] = self.score(keywords)
+        return scores
+
+
+def matches_path(path):
+    """索引文件对应的关键词匹配结果缓存路径"""
+    return os.path.splitext(path)[0] + MATCHES_SUFFIX
+
+
+def index_path(path):
+    """输入文件对应的默认索引路径"""
+    return os.path.splitext(path)[0] + INDEX_SUFFIX
+
+
+def build_index(paths, output, ngram=DEFAULT_NGRAM):
+    """读取导出文件或语料库，构建并保存词项索引，返回 TermIndex"""
+    term_index = TermIndex.build(iter_inputs(paths), ngram)
+    term_index.save(output)
+    return term_index
+
+
+def write_scores(path, term_index, scores):
+    """将各类别得分保存为CSV（第一列为文献编号）"""
+    import csv
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Index'] + list(scores))
+        # 整数得分写成整数（如 3 而不是 3.0），加权得分保留小数
+        columns = [[int(v) if v.is_integer() else v for v in s.astype(float).tolist()] for s in scores.values()]
+        for row in zip(term_index.index.tolist(), *columns):
+            writer.writerow(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="文献摘要的词项-文献稀疏矩阵：一次构建，修改关键词后快速重新计算")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="构建词项索引")
+    build_parser.add_argument("inputs", nargs="+", metavar="html_file",
+                              help="WOS导出HTML文件、语料库文件、包含导出文件的目录或通配符")
+    build_parser.add_argument("-o", "--output", help=f"索引文件路径（默认与单个输入文件同名，扩展名为 {INDEX_SUFFIX}）")
+    build_parser.add_argument("--ngram", type=int, default=DEFAULT_NGRAM,
+                              help=f"词项包含的最大单词数（默认{DEFAULT_NGRAM}）")
+
+    score_parser = subparsers.add_parser("score", help="用索引计算各类别的命中文献数和得分")
+    score_parser.add_argument("index", help="词项索引文件")
+    score_parser.add_argument("--lexicon", default=DEFAULT_LEXICON_PATH, help="词表文件（默认 lexicons.json）")
+    score_parser.add_argument("--keywords", nargs="+", metavar="PATTERN",
+                              help="只计算这一组关键词（正则模式），不读取词表文件")
+    score_parser.add_argument("-o", "--output", help="将各文献的得分保存为CSV")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        inputs = expand_inputs(args.inputs)
+        missing = [path for path in inputs if not os.path.isfile(path)]
+        for path in missing:
+            print(f"错误: 文件 '{path}' 不存在")
+        if missing:
+            sys.exit(1)
+        output = args.output or (index_path(inputs[0]) if len(inputs) == 1 else "corpus" + INDEX_SUFFIX)
+        term_index = build_index(inputs, output, args.ngram)
+        print(f"已为 {len(term_index)} 篇文献构建词项索引（{term_index.term_count} 个词项，"
+              f"{term_index.matrix.nnz} 个非零项）: {output}")
+        sys.exit(0)
+
+    term_index = TermIndex.load(args.index)
+    term_index.load_matches(matches_path(args.index))
+    start = time.perf_counter()
+    if args.keywords:
+        scores = {"keywords": term_index.score(args.keywords)}
+    else:
+        with open(args.lexicon, 'r', encoding='utf-8') as f:
+            scores = term_index.score_lexicon(json.load(f))
+    elapsed = time.perf_counter() - start
+    term_index.save_matches(matches_path(args.index))
+
+    print(f"共 {len(term_index)} 篇文献，计算用时 {elapsed * 1000:.0f} ms")
+    for name, score in scores.items():
+        print(f"{name}: {int(np.count_nonzero(score))} 篇命中，得分合计 {score.sum():g}")
+    if args.output:
+        write_scores(args.output, term_index, scores)
+        print(f"各文献得分已保存到: {args.output}")
@@ -0,0 +1,263 @@
+import os
+import re
+import glob
+import html
+import mmap
+import codecs
+import hashlib
+
+# WOS Printable 导出中每条记录以 "Record N of M" 开头
+RECORD_MARKER = re.compile(rb'Record \d+ of \d+')
+
+# 校验编码时每次解码的字节数
+DECODE_CHUNK = 1 << 20
+
+# 记录中 "Times Cited in ..." 之后只剩被引次数、ISSN、机构等不需要的字段，解析前截断
+FIELDS_END = b'<b>Times Cited in'
+
+# 作者标识符嵌套表格体积大且不需要，解析前剔除
+AUTHOR_TABLE_START = b'<table class="FR_table_borders"'
+TABLE_END = b'</table>'
+
+# 字段值中残留的行内标记（导出时被转义的 <i>、<sub> 等，解析后以文本形式出现）；
+# 尖括号内带空白的标记（如 "</ sub>"、"< /i>"）只识别常见的行内标记名，以免把 "a < b ... >" 之类的正文当作标记
+INLINE_TAG = re.compile(
+    r'</?[A-Za-z][A-Za-z0-9]*(?:\s[^<>]*)?/?>'
+    r'|<\s*/?\s*(?i:i|b|u|em|strong|sub|sup|inf|sc|scp|br)\s*/?\s*>'
+)
+
+# 出版信息中的年份（如 "SEP 2001"、"1992-Apr-15"、"DEC 15 2019"）
+YEAR = re.compile(r'\b(1[5-9]\d{2}|20\d{2})\b')
+
+# 需要读取的字段，其余字段（被引次数、机构地址等）直接跳过
+WANTED_FIELDS = frozenset([
+    'Title', 'By', 'Published', 'Early Access Date', 'DOI', 'Abstract', 'Meeting Abstract'
+])
+
+# 可能重复出现的字段（如先有一行占位摘要 "." 再有正文），各行内容依次拼接
+REPEATED_FIELDS = frozenset(['Abstract', 'Meeting Abstract'])
+
+# 作者全名括注，如 "Fontana, L (Fontana, Luc)"
+AUTHOR_FULL_NAME = re.compile(r'\s*\([^)]*\)')
+
+# 归一化标题时去除的标点和空白
+NON_WORD = re.compile(r'[\W_]+')
+
+# 指纹中使用的摘要开头长度（与结果CSV中保存的摘要长度一致）
+FINGERPRINT_ABSTRACT = 300
+
+# DOI 常见的链接前缀，归一化时去除
+DOI_PREFIXES = ('https://doi.org/', 'http://doi.org/', 'https://dx.doi.org/', 'http://dx.doi.org/', 'doi:')
+
+
+def detect_encoding(buffer):
+    """检测导出文件的编码：识别BOM，否则流式校验UTF-8，不合法时退回latin-1"""
+    if buffer[:3] == codecs.BOM_UTF8:
+        return 'utf-8'
+
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for offset in range(0, len(buffer), DECODE_CHUNK):
+            decoder.decode(buffer[offset:offset + DECODE_CHUNK])
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return 'latin-1'
+    return 'utf-8'
+
+
+def _next_marker(buffer, pos):
+    """查找下一个记录标记，返回其 (起始, 结束) 位置"""
+    m = RECORD_MARKER.search(buffer, pos)
+    return m.span() if m else None
+
+
+def _record_spans(buffer):
+    """逐条产出记录正文（标记之后到下一个标记之前）的 (起始, 结束) 位置"""
+    marker = _next_marker(buffer, 0)
+    while marker:
+        start = marker[1]
+        marker = _next_marker(buffer, start)
+        yield start, (marker[0] if marker else len(buffer))
+
+
+def iter_file_records(path):
+    """以内存映射方式读取单个导出文件，逐条产出记录文本（不含页眉）"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # 整个文件只检测一次编码
+            encoding = detect_encoding(mm)
+            for start, end in _record_spans(mm):
+                yield mm[start:end].decode(encoding)
+
+
+def iter_records(paths):
+    """依次读取一个或多个导出文件，逐条产出记录文本
+
+    每次只解码并保留一条记录，内存占用与文件大小和文件数量无关。
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    for path in paths:
+        yield from iter_file_records(path)
+
+
+def clean_text(text):
+    """还原被二次转义的字符、去除残留的行内标记并压缩空白"""
+    text = html.unescape(text)
+    if '<' in text:
+        text = INLINE_TAG.sub('', text)
+    return ' '.join(text.split())
+
+
+def _field_value(label):
+    """读取字段标签之后的单元格文本（<value> 内容或紧随标签的文字），跳过嵌套表格"""
+    parts = [label.tail or '']
+    for sibling in label.itersiblings():
+        if sibling.tag != 'table':
+            parts.append(''.join(sibling.itertext()))
+        parts.append(sibling.tail or '')
+    return clean_text(''.join(parts))
+
+
+def record_fields(root, wanted=WANTED_FIELDS):
+    """读取一条记录表格中需要的 {字段名: 值}，同名字段只保留第一次出现的值（摘要除外）"""
+    fields = {}
+    # 字段名位于单元格开头的 <b>字段名:</b> 中
+    for label in root.iter('b'):
+        name = label.text
+        if not name:
+            continue
+        name = name.strip()[:-1]
+        if name not in wanted:
+            continue
+        if name not in fields:
+            fields[name] = _field_value(label)
+        elif name in REPEATED_FIELDS:
+            fields[name] = f"{fields[name]} {_field_value(label)}"
+    return fields
+
+
+def build_article(fields, index):
+    """由记录字段构造文献信息字典"""
+    abstract = fields.get('Abstract') or fields.get('Meeting Abstract', '')
+    published = fields.get('Published') or fields.get('Early Access Date', '')
+    year_match = YEAR.search(published)
+    return {
+        'index': index,
+        'title': fields.get('Title') or f"文献 #{index}",
+        'authors': AUTHOR_FULL_NAME.sub('', fields.get('By', '')),
+        'year': year_match.group(1) if year_match else "N/A",
+        'doi': fields.get('DOI', ''),
+        'abstract': abstract.lower()
+    }
+
+
+def normalize_title(title):
+    """标题归一化：转为小写并去除标点和多余空白"""
+    return NON_WORD.sub(' ', title.lower()).strip()
+
+
+def normalize_doi(doi):
+    """DOI归一化：转为小写并去除链接前缀（https://doi.org/ 等）"""
+    doi = (doi or '').strip().lower()
+    for prefix in DOI_PREFIXES:
+        if doi.startswith(prefix):
+            return doi[len(prefix):]
+    return doi
+
+
+def article_doi(article):
+    """文献归一化的DOI，没有DOI时为空字符串"""
+    return normalize_doi(article.get('doi'))
+
+
+def article_title(article):
+    """文献归一化的标题，没有标题（或只有“文献 #N”占位标题）时为空字符串"""
+    title = article.get('title') or ''
+    if title == f"文献 #{article.get('index')}":
+        # 缺少标题时的占位标题随编号变化，不参与比较
+        return ''
+    if '<' in title or '&' in title:
+        # 从结果CSV读回的标题可能残留HTML标记或转义字符（早期版本写入的结果），先还原再比较
+        title = clean_text(title)
+    return normalize_title(title)
+
+
+def article_key(article):
+    """文献的去重键：优先使用DOI，没有DOI时使用标题、年份和摘要开头计算的指纹
+
+    既可用于刚解析的文献信息，也可用于从结果CSV读回的记录（摘要已截断）。
+    DOI和标题的归一化与跨文件去重（dedup.Deduplicator）相同。
+    """
+    doi = article_doi(article)
+    if doi:
+        return 'doi:' + doi
+    abstract = (article.get('abstract') or '')[:FINGERPRINT_ABSTRACT]
+    raw = '\n'.join([article_title(article), str(article.get('year', '')), ' '.join(abstract.split())])
+    return 'fp:' + hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _record_table(buffer, start, end):
+    """截取记录中需要解析的部分：去掉作者标识符表格和被引次数之后的字段"""
+    cut = buffer.find(FIELDS_END, start, end)
+    if cut >= 0:
+        end = cut
+    table_start = buffer.find(AUTHOR_TABLE_START, start, end)
+    if table_start < 0:
+        return buffer[start:end]
+    table_end = buffer.find(TABLE_END, table_start, end)
+    if table_end < 0:
+        return buffer[start:table_start]
+    return buffer[start:table_start] + buffer[table_end + len(TABLE_END):end]
+
+
+def iter_file_fields(path):
+    """按表格结构逐条解析单个导出文件，逐条产出记录字段"""
+    from lxml import etree
+
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            encoding = detect_encoding(mm)
+            parser = etree.HTMLParser(encoding=encoding)
+            for start, end in _record_spans(mm):
+                root = etree.fromstring(_record_table(mm, start, end), parser)
+                yield record_fields(root) if root is not None else {}
+
+
+def iter_articles(paths):
+    """依次解析一个或多个导出文件，逐条产出字段已清理的文献信息
+
+    每条记录只解析一次表格结构（单元格中的 <b>字段名:</b> 与其后的值），
+    标题、作者、摘要中不会残留 HTML 标记，同时补充年份和 DOI。需要安装 lxml。
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    index = 0
+    for path in paths:
+        for fields in iter_file_fields(path):
+            index += 1
+            yield build_article(fields, index)
+
+
+def expand_inputs(patterns):
+    """将命令行给出的文件、目录或通配符展开为导出文件列表（按文件名排序、去除重复）
+
+    目录展开为其中所有 .html/.htm 文件；不存在的路径和没有匹配的通配符原样保留，由调用方报错。
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matched = sorted(
+                os.path.join(pattern, name) for name in os.listdir(pattern)
+                if name.lower().endswith(('.html', '.htm'))
+            )
+        elif glob.has_magic(pattern):
+            matched = sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+        else:
+            matched = [pattern]
+        files.extend(matched or [pattern])
+    return list(dict.fromkeys(files))